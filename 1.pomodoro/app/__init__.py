@@ -8,8 +8,17 @@ def create_app(test_config=None):
     # デフォルト設定
     app.config.from_mapping(
         SECRET_KEY="dev",
+        COMPUTE_MAX_WORKERS=None,
+        # 未完了の再計算ジョブの上限（超えると 503）
+        COMPUTE_MAX_PENDING_JOBS=8,
+        # JS/CSS をバンドルしてフィンガープリント付きで配信
+        ASSET_BUNDLING=True,
     )
 
+    # orjson があれば使う高速JSONプロバイダ
+    from .serialization import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
     if test_config is not None:
         app.config.update(test_config)
 
@@ -18,6 +27,10 @@ def create_app(test_config=None):
 
     app.register_blueprint(bp)
 
+    # 静的アセットのバンドル
+    from . import assets
+    assets.init_app(app)
+
     # 簡易ストレージ（現時点ではメモリ）
     # 形式: list of {id, start_time_iso, end_time_iso, duration_sec, status, type}
     app.config.setdefault('POMODORO_STORE', [])
@@ -29,6 +42,19 @@ def create_app(test_config=None):
         'unlocked_badges': []  # list of badge IDs
     })
 
+    # ユーザー間ランキング（/api/complete で差分更新）
+    from .leaderboard import Leaderboards
+    app.config.setdefault('LEADERBOARDS', Leaderboards())
+
+    # 重い再計算用のプロセスプール（初回投入時に起動）
+    from .compute import CompletedColumns, ComputeExecutor
+    app.extensions['compute_executor'] = ComputeExecutor(
+        max_workers=app.config['COMPUTE_MAX_WORKERS'],
+        max_pending=app.config['COMPUTE_MAX_PENDING_JOBS'],
+    )
+    # 再計算ジョブへ渡す完了レコードの列配列（/api/complete で差分更新）
+    app.extensions['completed_columns'] = CompletedColumns()
+
     from .api import bp as api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
 
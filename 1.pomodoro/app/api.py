@@ -4,14 +4,27 @@ from .gamification import (
     calculate_level_and_xp, check_achievements, calculate_streak,
     get_weekly_stats, get_monthly_stats, XP_PER_POMODORO
 )
+from .compute import JOB_KINDS, JobQueueFullError, get_completed_columns, get_executor
+from .leaderboard import BOARDS
+from .serialization import OK_BODY, ID_REQUIRED_BODY, NOT_FOUND_BODY, achievements_body
 
 bp = Blueprint('api', __name__)
 
+# ユーザーIDが指定されない場合の既定値（シングルユーザー運用）
+DEFAULT_USER_ID = 'local'
+# リーダーボード取得件数の上限
+MAX_LEADERBOARD_LIMIT = 100
+
 
 def _now_iso():
     return datetime.now(timezone.utc).isoformat()
 
 
+def _raw_json(body, status=200):
+    """シリアライズ済みのJSONバイト列をそのままレスポンスにする"""
+    return current_app.response_class(body, status=status, mimetype='application/json')
+
+
 @bp.route('/start', methods=['POST'])
 def start():
     payload = request.get_json() or {}
@@ -25,6 +38,7 @@ def start():
         'duration_sec': None,
         'status': 'running',
         'type': ptype,
+        'user_id': str(payload.get('user_id') or DEFAULT_USER_ID),
     }
     store.append(rec)
     current_app.config['POMODORO_NEXT_ID'] = nid + 1
@@ -36,13 +50,14 @@ def complete():
     payload = request.get_json() or {}
     pid = payload.get('id')
     if pid is None:
-        return jsonify({'error': 'id required'}), 400
+        return _raw_json(ID_REQUIRED_BODY, 400)
     store = current_app.config['POMODORO_STORE']
-    rec = next((r for r in store if r['id'] == pid), None)
-    if rec is None:
-        return jsonify({'error': 'not found'}), 404
+    position = next((i for i, r in enumerate(store) if r['id'] == pid), None)
+    if position is None:
+        return _raw_json(NOT_FOUND_BODY, 404)
+    rec = store[position]
     if rec['status'] == 'completed':
-        return jsonify({'ok': True}), 200
+        return _raw_json(OK_BODY)
     rec['end_time'] = _now_iso()
     # compute duration if start_time available
     try:
@@ -52,6 +67,7 @@ def complete():
     except Exception:
         rec['duration_sec'] = payload.get('duration_sec')
     rec['status'] = 'completed'
+    current_app.extensions['completed_columns'].mark_completed(store, position)
     
     # ゲーミフィケーション: XPを付与
     gamification_data = current_app.config['GAMIFICATION_DATA']
@@ -62,6 +78,12 @@ def complete():
     old_level_data = calculate_level_and_xp(old_xp)
     new_level_data = calculate_level_and_xp(gamification_data['total_xp'])
     level_up = new_level_data['level'] > old_level_data['level']
+
+    # ランキングへ反映（XP は記録を開始したユーザーに付く）
+    user_id = rec.get('user_id', DEFAULT_USER_ID)
+    current_app.config['LEADERBOARDS'].record_completion(
+        user_id, XP_PER_POMODORO, datetime.fromisoformat(rec['end_time'])
+    )
     
     return jsonify({
         'ok': True,
@@ -132,10 +154,7 @@ def achievements():
     store = current_app.config['POMODORO_STORE']
     badges = check_achievements(store)
     
-    return jsonify({
-        'achievements': badges,
-        'total_count': len(badges)
-    }), 200
+    return _raw_json(achievements_body(badges))
 
 
 @bp.route('/gamification/weekly-stats', methods=['GET'])
@@ -155,3 +174,53 @@ def monthly_stats():
     
     return jsonify(stats), 200
 
+
+@bp.route('/gamification/jobs', methods=['POST'])
+def submit_job():
+    """全履歴の再計算ジョブを投入（バックフィル、バッジ再判定など）"""
+    payload = request.get_json() or {}
+    kind = payload.get('kind')
+    if kind not in JOB_KINDS:
+        return jsonify({'error': 'unknown kind', 'kinds': sorted(JOB_KINDS)}), 400
+    try:
+        job_id = get_executor(current_app).submit(kind, get_completed_columns(current_app))
+    except JobQueueFullError:
+        resp = jsonify({'error': 'too many pending jobs'})
+        resp.headers['Retry-After'] = '5'
+        return resp, 503
+    return jsonify({'id': job_id, 'kind': kind, 'state': 'pending'}), 202
+
+
+@bp.route('/gamification/jobs/<int:job_id>', methods=['GET'])
+def job_status(job_id):
+    """再計算ジョブの状態と結果を取得"""
+    info = get_executor(current_app).status(job_id)
+    if info is None:
+        return jsonify({'error': 'not found'}), 404
+    return jsonify(info), 200
+
+
+@bp.route('/leaderboard/<board>', methods=['GET'])
+def leaderboard(board):
+    """リーダーボードの上位を取得（board: xp / weekly / streak）"""
+    if board not in BOARDS:
+        return jsonify({'error': 'unknown board'}), 404
+    try:
+        limit = int(request.args.get('limit', 10))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    limit = max(0, min(limit, MAX_LEADERBOARD_LIMIT))
+    offset = max(0, offset)
+    return jsonify(current_app.config['LEADERBOARDS'].top(board, limit, offset)), 200
+
+
+@bp.route('/leaderboard/<board>/users/<user_id>', methods=['GET'])
+def leaderboard_rank(board, user_id):
+    """指定ユーザーの順位を取得"""
+    if board not in BOARDS:
+        return jsonify({'error': 'unknown board'}), 404
+    info = current_app.config['LEADERBOARDS'].user_rank(board, user_id)
+    if info is None:
+        return jsonify({'error': 'not ranked'}), 404
+    return jsonify(info), 200
@@ -0,0 +1,328 @@
+"""静的アセットのバンドル・フィンガープリント・事前圧縮
+
+起動時に JS / CSS を1ファイルずつにまとめて軽量化し、内容ハッシュ付きの
+ファイル名（例: app.3f2a9c1b0d.js）で配信します。ファイル名が内容で決まるため
+`Cache-Control: immutable` で長期キャッシュでき、2回目以降の訪問では
+静的ファイルへのリクエストが発生しません。
+
+gzip（標準ライブラリ）と brotli（`brotli` がインストールされている場合）の
+圧縮済みバリアントも起動時に作っておき、Accept-Encoding に応じて返します。
+"""
+import gzip
+import hashlib
+import os
+import re
+from typing import Dict, List, Optional
+
+from flask import Blueprint, abort, current_app, request, url_for
+
+try:
+    import brotli
+except ImportError:  # 任意依存
+    brotli = None
+
+
+# バンドル名 → static フォルダからの相対パス（読み込み順）
+BUNDLES = {
+    'app.css': ['css/styles.css'],
+    'app.js': [
+        'js/timer_logic.js',
+        'js/scheduler.js',
+        'js/settings.js',
+        'js/timer_ui.js',
+        'js/gamification.js',
+    ],
+}
+
+CONTENT_TYPES = {
+    '.js': 'text/javascript; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+}
+
+# 内容ハッシュ付きのファイルは中身が変わらないので1年キャッシュさせる
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+bp = Blueprint('assets', __name__)
+
+
+# この直後の / は除算ではなく正規表現リテラルの開始になる
+_REGEX_PRECEDING_CHARS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_PRECEDING_WORDS = {
+    'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete',
+    'void', 'throw', 'yield', 'await', 'instanceof',
+}
+
+
+def _skip_string(source: str, i: int) -> int:
+    """i の引用符で始まる文字列リテラルの直後の位置"""
+    quote = source[i]
+    i += 1
+    while i < len(source) and source[i] != quote:
+        i += 2 if source[i] == '\\' else 1
+    return i + 1
+
+
+def _skip_template(source: str, i: int) -> int:
+    """i のバッククォートで始まるテンプレートリテラルの直後の位置（${...} の入れ子も辿る）"""
+    i += 1
+    n = len(source)
+    while i < n:
+        ch = source[i]
+        if ch == '\\':
+            i += 2
+        elif ch == '`':
+            return i + 1
+        elif source.startswith('${', i):
+            i = _skip_code_block(source, i + 2)
+        else:
+            i += 1
+    return n
+
+
+def _skip_code_block(source: str, i: int) -> int:
+    """${ の直後から、対応する } の直後までの位置"""
+    depth = 1
+    n = len(source)
+    while i < n:
+        ch = source[i]
+        if ch in ('"', "'"):
+            i = _skip_string(source, i)
+        elif ch == '`':
+            i = _skip_template(source, i)
+        elif source.startswith('//', i):
+            i = source.find('\n', i)
+            i = n if i < 0 else i
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+        else:
+            if ch == '{':
+                depth += 1
+            elif ch == '}':
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+            i += 1
+    return n
+
+
+def _skip_regex(source: str, i: int) -> int:
+    """i の / で始まる正規表現リテラルの直後の位置（文字クラス内の / は終端にしない）"""
+    i += 1
+    n = len(source)
+    in_class = False
+    while i < n and source[i] != '\n':
+        ch = source[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == '[':
+            in_class = True
+        elif ch == ']':
+            in_class = False
+        elif ch == '/' and not in_class:
+            i += 1
+            while i < n and (source[i].isalnum() or source[i] == '_'):
+                i += 1  # フラグ
+            return i
+        i += 1
+    return i
+
+
+def minify_js(source: str) -> str:
+    """コメント・インデント・空行を取り除く控えめな JS 軽量化
+
+    文字列・テンプレートリテラル（`${...}` の入れ子を含む）・正規表現リテラルは
+    そのまま出力し、空白の除去はそれ以外のコード部分だけに行います。改行は自動
+    セミコロン挿入に影響するため残します。正規表現か除算かは直前のトークンで判定します。
+    """
+    out = []
+    pending_space = ''
+    line_has_code = False
+    # 直前の（空白・コメント以外の）トークン末尾: 正規表現リテラルの判定に使う
+    last_char = ''
+    last_word = ''
+    i = 0
+    n = len(source)
+
+    def emit(text, is_word=False):
+        nonlocal pending_space, line_has_code, last_char, last_word
+        if pending_space and line_has_code:
+            out.append(pending_space)
+        pending_space = ''
+        out.append(text)
+        line_has_code = True
+        last_char = text[-1]
+        last_word = text if is_word else ''
+
+    def newline():
+        nonlocal pending_space, line_has_code
+        # 行末の空白と空行は出力しない
+        if line_has_code:
+            out.append('\n')
+        pending_space = ''
+        line_has_code = False
+
+    while i < n:
+        ch = source[i]
+        if ch in ('"', "'"):
+            j = _skip_string(source, i)
+            emit(source[i:j])
+        elif ch == '`':
+            j = _skip_template(source, i)
+            emit(source[i:j])
+        elif source.startswith('//', i):
+            j = source.find('\n', i)
+            j = n if j < 0 else j
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            j = n if end < 0 else end + 2
+            # 前後のトークンがつながらないよう、改行を含むなら改行、そうでなければ空白に置き換える
+            if '\n' in source[i:j]:
+                newline()
+            else:
+                pending_space = pending_space or ' '
+        elif ch == '\n':
+            newline()
+            j = i + 1
+        elif ch in ' \t\r':
+            pending_space += ch
+            j = i + 1
+        elif ch == '/' and (last_char == '' or last_char in _REGEX_PRECEDING_CHARS
+                            or last_word in _REGEX_PRECEDING_WORDS):
+            j = _skip_regex(source, i)
+            emit(source[i:j])
+        elif ch.isalnum() or ch in '_$':
+            j = i + 1
+            while j < n and (source[j].isalnum() or source[j] in '_$'):
+                j += 1
+            emit(source[i:j], is_word=True)
+        else:
+            emit(ch)
+            j = i + 1
+        i = j
+    newline()
+    return ''.join(out)
+
+
+# 中身を変更してはいけない CSS のトークン（文字列と url(...)）、およびコメント
+_CSS_TOKEN = re.compile(
+    r"""(?P<comment>/\*.*?\*/)"""
+    r"""|"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'"""
+    r"""|\burl\(\s*(?:"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|[^)]*)\s*\)""",
+    re.S | re.I,
+)
+
+
+def _minify_css_code(code: str) -> str:
+    code = re.sub(r'\s+', ' ', code)
+    code = re.sub(r'\s*([{};,>])\s*', r'\1', code)
+    return code.replace(';}', '}')
+
+
+def minify_css(source: str) -> str:
+    """コメントと余分な空白を取り除く CSS 軽量化（文字列と url() の中身はそのまま残す）"""
+    out = []
+    code = []  # コメントをはさんで隣り合うコードはまとめて処理する
+    pos = 0
+    for match in _CSS_TOKEN.finditer(source):
+        code.append(source[pos:match.start()])
+        pos = match.end()
+        if match.group('comment') is None:
+            out.append(_minify_css_code(''.join(code)))
+            out.append(match.group())
+            code = []
+    code.append(source[pos:])
+    out.append(_minify_css_code(''.join(code)))
+    return ''.join(out).strip() + '\n'
+
+
+MINIFIERS = {
+    '.js': minify_js,
+    '.css': minify_css,
+}
+
+# 連結時の区切り（JS は前のファイルの末尾で文が終わっていない場合に備える）
+SEPARATORS = {
+    '.js': ';\n',
+    '.css': '',
+}
+
+
+class Asset:
+    """1つのバンドル（内容ハッシュ付きファイル名と圧縮済みバリアント）"""
+
+    def __init__(self, bundle: str, body: bytes):
+        stem, ext = os.path.splitext(bundle)
+        digest = hashlib.sha256(body).hexdigest()
+        self.bundle = bundle
+        self.filename = f'{stem}.{digest[:10]}{ext}'
+        self.etag = digest[:20]
+        self.content_type = CONTENT_TYPES[ext]
+        self.variants = {'identity': body}
+        self.variants['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            self.variants['br'] = brotli.compress(body, quality=11)
+
+    def select(self, accept_encodings) -> str:
+        """Accept-Encoding から最も小さいバリアントを選ぶ"""
+        candidates = [enc for enc in self.variants if enc == 'identity' or accept_encodings[enc]]
+        return min(candidates, key=lambda enc: len(self.variants[enc]))
+
+
+class AssetPipeline:
+    """バンドルの構築とファイル名の解決"""
+
+    def __init__(self, static_folder: str, bundles: Dict[str, List[str]] = None):
+        self.static_folder = static_folder
+        self.bundles = bundles or BUNDLES
+        self.assets: Dict[str, Asset] = {}
+        self.by_filename: Dict[str, Asset] = {}
+
+    def build(self) -> 'AssetPipeline':
+        for bundle, sources in self.bundles.items():
+            ext = os.path.splitext(bundle)[1]
+            parts = []
+            for rel in sources:
+                with open(os.path.join(self.static_folder, rel), encoding='utf-8') as f:
+                    parts.append(MINIFIERS[ext](f.read()))
+            asset = Asset(bundle, SEPARATORS[ext].join(parts).encode('utf-8'))
+            self.assets[bundle] = asset
+            self.by_filename[asset.filename] = asset
+        return self
+
+    def get(self, filename: str) -> Optional[Asset]:
+        return self.by_filename.get(filename)
+
+
+@bp.route('/assets/<filename>')
+def serve(filename):
+    """フィンガープリント付きバンドルを配信"""
+    pipeline = current_app.extensions.get('assets')
+    asset = pipeline.get(filename) if pipeline is not None else None
+    if asset is None:
+        abort(404)
+    encoding = asset.select(request.accept_encodings)
+    resp = current_app.response_class(asset.variants[encoding], content_type=asset.content_type)
+    if encoding != 'identity':
+        resp.headers['Content-Encoding'] = encoding
+    resp.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    resp.headers['Vary'] = 'Accept-Encoding'
+    resp.set_etag(f'{asset.etag}-{encoding}')
+    return resp.make_conditional(request)
+
+
+def asset_urls(bundle: str) -> List[str]:
+    """テンプレート用: バンドル（無効時は元ファイル群）の URL 一覧"""
+    pipeline = current_app.extensions.get('assets')
+    if pipeline is not None:
+        return [url_for('assets.serve', filename=pipeline.assets[bundle].filename)]
+    return [url_for('static', filename=rel) for rel in BUNDLES[bundle]]
+
+
+def init_app(app):
+    """ASSET_BUNDLING が有効ならバンドルを構築して配信を登録"""
+    if app.config['ASSET_BUNDLING']:
+        app.extensions['assets'] = AssetPipeline(app.static_folder).build()
+    app.register_blueprint(bp)
+    app.add_template_global(asset_urls)
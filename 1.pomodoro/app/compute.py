@@ -0,0 +1,331 @@
+"""重い集計処理をプロセスプールで実行するコンピュートエグゼキュータ
+
+全履歴の再計算（バックフィル、ルール変更後のバッジ再判定、長期間の分析）は
+リクエストスレッドで実行すると GIL を握り続け、同じプロセスの他のリクエストを
+止めてしまいます。ここではそれらをプロセスプールへ逃がします。
+
+入力は pickle した dict ではなく、共有メモリ上の固定長配列として渡します。
+完了レコードごとにストア上の位置・end_time（エポックからのマイクロ秒と UTC オフセット秒）・
+duration_sec の4列（すべて int64）だけを詰めるため、転送量はレコード数 × 32 バイトに収まります。
+end_time はオフセット付き・なし（naive）を区別したまま往復するので、ワーカーでの集計結果は
+インライン計算と一致します（ISO 形式は isoformat() の表記に正規化されます）。
+
+列は CompletedColumns が /api/complete のたびに差分で更新しておくので、
+投入時にリクエストスレッドが行うのは配列のコピーだけです（ISO文字列の解析はしない）。
+"""
+import itertools
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from multiprocessing import get_context, shared_memory
+from typing import Dict, List, Optional, Tuple
+
+from . import gamification
+
+
+# duration_sec が None のレコードを表す番兵値
+_NO_DURATION = -1
+# end_time が無い・解析できないレコード / オフセットなし（naive）の end_time を表す番兵値
+_NO_END_TIME = -2 ** 63
+_NAIVE = -2 ** 63
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_EPOCH_NAIVE = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# 終了済みジョブを保持する上限（これを超えると古いものから破棄）
+MAX_RETAINED_JOBS = 256
+
+
+class JobQueueFullError(Exception):
+    """未完了のジョブ数が上限に達している"""
+
+
+def _run_achievements(records: List[Dict]):
+    return gamification.check_achievements(records)
+
+
+def _run_streak(records: List[Dict]):
+    return {'streak_days': gamification.calculate_streak(records)}
+
+
+def _run_weekly_stats(records: List[Dict]):
+    return gamification.get_weekly_stats(records)
+
+
+def _run_monthly_stats(records: List[Dict]):
+    return gamification.get_monthly_stats(records)
+
+
+# ジョブ種別 → ワーカー側で実行する関数
+JOB_KINDS = {
+    'achievements': _run_achievements,
+    'streak': _run_streak,
+    'weekly_stats': _run_weekly_stats,
+    'monthly_stats': _run_monthly_stats,
+}
+
+
+def _encode_end_time(iso_string: Optional[str]) -> Tuple[int, int]:
+    """ISO文字列を (エポックからのマイクロ秒, UTC オフセット秒) に変換
+
+    naive な日時は壁時計の値をそのままマイクロ秒にし、オフセットを _NAIVE にします。
+    """
+    if not iso_string:
+        return _NO_END_TIME, _NAIVE
+    try:
+        dt = datetime.fromisoformat(iso_string)
+    except Exception:
+        return _NO_END_TIME, _NAIVE
+    offset = dt.utcoffset()
+    if offset is None:
+        return (dt - _EPOCH_NAIVE) // _MICROSECOND, _NAIVE
+    return (dt - _EPOCH) // _MICROSECOND, offset // timedelta(seconds=1)
+
+
+def _decode_end_time(micros: int, offset: int) -> Optional[str]:
+    if micros == _NO_END_TIME:
+        return None
+    if offset == _NAIVE:
+        return (_EPOCH_NAIVE + timedelta(microseconds=micros)).isoformat()
+    tz = timezone(timedelta(seconds=offset))
+    return (_EPOCH + timedelta(microseconds=micros)).astimezone(tz).isoformat()
+
+
+class CompletedColumns:
+    """完了レコードの列配列（ストアへの追記・完了に合わせて差分更新する）
+
+    ストアは追記のみのリストという前提で、前回から増えた末尾だけを走査します。
+    走査済みの実行中レコードが後から完了した場合は mark_completed() で追加します。
+    行はストア上の位置を持つので、完了順に追加してもワーカー側でストア順に戻せます。
+    """
+
+    def __init__(self):
+        self._store = None
+        self._scanned = 0
+        self.positions = array('q')
+        self.end_micros = array('q')
+        self.end_offsets = array('q')
+        self.durations = array('q')
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_store(cls, store: List[Dict]) -> 'CompletedColumns':
+        columns = cls()
+        columns.sync(store)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def columns(self):
+        return self.positions, self.end_micros, self.end_offsets, self.durations
+
+    def _add(self, position: int, rec: Dict) -> None:
+        self.positions.append(position)
+        micros, offset = _encode_end_time(rec.get('end_time'))
+        self.end_micros.append(micros)
+        self.end_offsets.append(offset)
+        duration = rec.get('duration_sec')
+        self.durations.append(_NO_DURATION if duration is None else int(duration))
+
+    def sync(self, store: List[Dict]) -> None:
+        """ストアの末尾に追加されたレコードを取り込む（別のストアなら作り直す）"""
+        with self._lock:
+            if store is not self._store or len(store) < self._scanned:
+                self._store = store
+                self._scanned = 0
+                for column in self.columns():
+                    del column[:]
+            for position in range(self._scanned, len(store)):
+                if store[position]['status'] == 'completed':
+                    self._add(position, store[position])
+            self._scanned = len(store)
+
+    def mark_completed(self, store: List[Dict], position: int) -> None:
+        """store[position] が完了したことを反映する"""
+        with self._lock:
+            if store is self._store and position < self._scanned:
+                self._add(position, store[position])
+        self.sync(store)
+
+
+def pack_completed(columns: CompletedColumns) -> Tuple[shared_memory.SharedMemory, int]:
+    """列配列を共有メモリへコピーする
+
+    レイアウト: [position × n][end_time マイクロ秒 × n][end_time オフセット秒 × n][duration_sec × n]
+    （すべて int64）。呼び出し側が close() / unlink() の責任を持ちます。
+    """
+    with columns._lock:
+        n = len(columns)
+        # サイズ 0 の共有メモリは作れないため最低 1 バイト確保する
+        shm = shared_memory.SharedMemory(create=True, size=max(1, n * 32))
+        for i, column in enumerate(columns.columns()):
+            shm.buf[i * n * 8:(i + 1) * n * 8] = memoryview(column).cast('B')
+    return shm, n
+
+
+def unpack_completed(buf, n: int) -> List[Dict]:
+    """共有メモリの列配列からゲーミフィケーション関数が扱えるレコードを復元（ストア順）"""
+    positions, micros, offsets, durations = (buf[i * n * 8:(i + 1) * n * 8].cast('q') for i in range(4))
+    try:
+        records = []
+        for i in sorted(range(n), key=positions.__getitem__):
+            duration = durations[i]
+            records.append({
+                'end_time': _decode_end_time(micros[i], offsets[i]),
+                'duration_sec': None if duration == _NO_DURATION else duration,
+                'status': 'completed',
+            })
+        return records
+    finally:
+        for column in (positions, micros, offsets, durations):
+            column.release()
+
+
+def _execute(kind: str, shm_name: str, n: int):
+    """ワーカープロセスのエントリポイント"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        records = unpack_completed(shm.buf, n)
+    finally:
+        shm.close()
+    return JOB_KINDS[kind](records)
+
+
+class ComputeExecutor:
+    """全履歴の再計算をプロセスプールで実行し、ジョブとして追跡する
+
+    プールは最初の投入時に起動します。`run()` は結果を待つ同期版で、
+    待機中は GIL を手放すため他のリクエストスレッドを止めません。
+    ワーカーが異常終了（OOM kill など）してプールが壊れた場合は、次の投入時に
+    作り直します（実行中だったジョブは failed になります）。
+    未完了のジョブ（待ち + 実行中）は max_pending 件までで、超える投入は
+    共有メモリを確保する前に JobQueueFullError で断ります。
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, mp_context: str = 'spawn',
+                 max_pending: int = 8):
+        self.max_workers = max_workers
+        self.mp_context = mp_context
+        self.max_pending = max_pending
+        self._pending = 0
+        self._pool = None
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._ids = itertools.count(1)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=get_context(self.mp_context),
+                )
+            return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        """壊れたプールを破棄する（他のスレッドが作り直し済みなら何もしない）"""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit_future(self, kind: str, columns: CompletedColumns):
+        if kind not in JOB_KINDS:
+            raise ValueError(f'unknown job kind: {kind}')
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFullError(f'too many pending jobs (max {self.max_pending})')
+            self._pending += 1
+        try:
+            shm, n = pack_completed(columns)
+        except Exception:
+            self._finish_one()
+            raise
+        try:
+            pool = self._get_pool()
+            try:
+                future = pool.submit(_execute, kind, shm.name, n)
+            except BrokenProcessPool:
+                # 一度だけプールを作り直して再投入する
+                self._discard_pool(pool)
+                future = self._get_pool().submit(_execute, kind, shm.name, n)
+        except Exception:
+            shm.close()
+            shm.unlink()
+            self._finish_one()
+            raise
+
+        def _release(_future):
+            shm.close()
+            shm.unlink()
+            self._finish_one()
+
+        future.add_done_callback(_release)
+        return future
+
+    def _finish_one(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def run(self, kind: str, columns: CompletedColumns, timeout: Optional[float] = None):
+        """再計算をワーカーで実行し、結果を待って返す"""
+        return self._submit_future(kind, columns).result(timeout=timeout)
+
+    def submit(self, kind: str, columns: CompletedColumns) -> int:
+        """再計算をジョブとして投入し、ジョブIDを返す"""
+        future = self._submit_future(kind, columns)
+        with self._lock:
+            job_id = next(self._ids)
+            self._jobs[job_id] = (kind, future)
+            self._evict_finished()
+        return job_id
+
+    def _evict_finished(self):
+        # ロック取得済みの前提
+        excess = len(self._jobs) - MAX_RETAINED_JOBS
+        if excess <= 0:
+            return
+        for job_id in [jid for jid, (_, f) in self._jobs.items() if f.done()][:excess]:
+            del self._jobs[job_id]
+
+    def status(self, job_id: int) -> Optional[Dict]:
+        """ジョブの状態（pending / running / done / failed）を返す"""
+        with self._lock:
+            entry = self._jobs.get(job_id)
+        if entry is None:
+            return None
+        kind, future = entry
+        info = {'id': job_id, 'kind': kind}
+        if not future.done():
+            info['state'] = 'running' if future.running() else 'pending'
+        elif future.exception() is not None:
+            info['state'] = 'failed'
+            info['error'] = str(future.exception())
+        else:
+            info['state'] = 'done'
+            info['result'] = future.result()
+        return info
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+def get_executor(app) -> ComputeExecutor:
+    """アプリに紐づくエグゼキュータを取得"""
+    return app.extensions['compute_executor']
+
+
+def get_completed_columns(app) -> CompletedColumns:
+    """アプリのストアに追従させた列配列を取得"""
+    columns = app.extensions['completed_columns']
+    columns.sync(app.config['POMODORO_STORE'])
+    return columns
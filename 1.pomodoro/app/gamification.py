@@ -8,6 +8,48 @@ XP_PER_POMODORO = 10  # 1ポモドーロあたりのXP
 XP_FOR_LEVEL = lambda level: 100 + (level - 1) * 50  # レベルアップに必要なXP
 
 
+# バッジの静的メタデータ（名前・説明・アイコン）
+BADGE_DEFINITIONS = {
+    'weekly_10': {
+        'id': 'weekly_10',
+        'name': '今週10回完了',
+        'description': '今週10回のポモドーロを完了しました',
+        'icon': '🏆',
+    },
+    'streak_3': {
+        'id': 'streak_3',
+        'name': '3日連続',
+        'description': '3日連続でポモドーロを完了しました',
+        'icon': '🔥',
+    },
+    'streak_7': {
+        'id': 'streak_7',
+        'name': '7日連続',
+        'description': '1週間連続でポモドーロを完了しました',
+        'icon': '⭐',
+    },
+    'first_pomodoro': {
+        'id': 'first_pomodoro',
+        'name': '初めてのポモドーロ',
+        'description': '最初のポモドーロを完了しました',
+        'icon': '🌱',
+    },
+    'total_50': {
+        'id': 'total_50',
+        'name': '50回完了',
+        'description': '合計50回のポモドーロを完了しました',
+        'icon': '💯',
+    },
+}
+
+
+def _badge(badge_id: str, unlocked_at) -> Dict:
+    """静的メタデータに獲得日時を付けたバッジを作成"""
+    badge = dict(BADGE_DEFINITIONS[badge_id])
+    badge['unlocked_at'] = unlocked_at
+    return badge
+
+
 def calculate_level_and_xp(total_xp: int) -> Dict:
     """総XPからレベルと現在レベルでのXPを計算"""
     level = 1
@@ -50,55 +92,27 @@ def check_achievements(store: List[Dict]) -> List[Dict]:
     # バッジ判定
     badges = []
     
+    now_iso = datetime.now(timezone.utc).isoformat()
+    
     # 今週10回完了
     if len(week_completed) >= 10:
-        badges.append({
-            'id': 'weekly_10',
-            'name': '今週10回完了',
-            'description': '今週10回のポモドーロを完了しました',
-            'icon': '🏆',
-            'unlocked_at': datetime.now(timezone.utc).isoformat()
-        })
+        badges.append(_badge('weekly_10', now_iso))
     
     # 3日連続
     if streak >= 3:
-        badges.append({
-            'id': 'streak_3',
-            'name': '3日連続',
-            'description': '3日連続でポモドーロを完了しました',
-            'icon': '🔥',
-            'unlocked_at': datetime.now(timezone.utc).isoformat()
-        })
+        badges.append(_badge('streak_3', now_iso))
     
     # 7日連続
     if streak >= 7:
-        badges.append({
-            'id': 'streak_7',
-            'name': '7日連続',
-            'description': '1週間連続でポモドーロを完了しました',
-            'icon': '⭐',
-            'unlocked_at': datetime.now(timezone.utc).isoformat()
-        })
+        badges.append(_badge('streak_7', now_iso))
     
     # 初回完了
     if len(completed) >= 1:
-        badges.append({
-            'id': 'first_pomodoro',
-            'name': '初めてのポモドーロ',
-            'description': '最初のポモドーロを完了しました',
-            'icon': '🌱',
-            'unlocked_at': completed[0].get('end_time')
-        })
+        badges.append(_badge('first_pomodoro', completed[0].get('end_time')))
     
     # 50回完了
     if len(completed) >= 50:
-        badges.append({
-            'id': 'total_50',
-            'name': '50回完了',
-            'description': '合計50回のポモドーロを完了しました',
-            'icon': '💯',
-            'unlocked_at': datetime.now(timezone.utc).isoformat()
-        })
+        badges.append(_badge('total_50', now_iso))
     
     return badges
 
@@ -0,0 +1,268 @@
+"""ユーザー間ランキング（リーダーボード）
+
+ユーザー数が増えてもリクエストごとに全件ソートしないよう、スコア順の
+インデックス付きスキップリストを `/api/complete` のたびに差分更新します。
+上位K件の取得は O(log n + K)、「自分の順位」は O(log n) です。
+"""
+import math
+import random
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, height: int):
+        self.key = key
+        self.next = [None] * height
+        # width[i]: next[i] までにレベル0で何ステップ進むか
+        self.width = [1] * height
+
+
+class IndexableSkipList:
+    """位置（順位）でアクセスできるソート済みスキップリスト
+
+    各リンクに幅を持たせることで、挿入・削除・順位取得・位置指定アクセスを
+    すべて期待 O(log n) で行えます。
+    """
+
+    def __init__(self, expected_size: int = 1_000_000):
+        self._max_levels = 1 + int(math.log(max(expected_size, 2), 2))
+        self._head = _Node(None, self._max_levels)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _random_height(self) -> int:
+        return min(self._max_levels, 1 - int(math.log(1.0 - random.random(), 2)))
+
+    def _find_chain(self, key):
+        """各レベルで key 未満の最後のノードと、そこまでのステップ数を求める"""
+        chain = [None] * self._max_levels
+        steps = [0] * self._max_levels
+        node = self._head
+        for level in reversed(range(self._max_levels)):
+            nxt = node.next[level]
+            while nxt is not None and nxt.key < key:
+                steps[level] += node.width[level]
+                node = nxt
+                nxt = node.next[level]
+            chain[level] = node
+        return chain, steps
+
+    def insert(self, key) -> None:
+        chain, steps = self._find_chain(key)
+        height = self._random_height()
+        node = _Node(key, height)
+        steps_at_level = 0
+        for level in range(height):
+            prev = chain[level]
+            node.next[level] = prev.next[level]
+            prev.next[level] = node
+            node.width[level] = prev.width[level] - steps_at_level
+            prev.width[level] = steps_at_level + 1
+            steps_at_level += steps[level]
+        for level in range(height, self._max_levels):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key) -> None:
+        chain, _ = self._find_chain(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        height = len(node.next)
+        for level in range(height):
+            prev = chain[level]
+            prev.width[level] += node.width[level] - 1
+            prev.next[level] = node.next[level]
+        for level in range(height, self._max_levels):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def index(self, key) -> int:
+        """key の0始まりの位置を返す（存在しない場合は KeyError）"""
+        chain, steps = self._find_chain(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        return sum(steps)
+
+    def slice(self, start: int, count: int) -> List:
+        """位置 start から count 件のキーを返す"""
+        if start < 0 or start >= self._size or count <= 0:
+            return []
+        node = self._head
+        remaining = start + 1
+        for level in reversed(range(self._max_levels)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        keys = []
+        while node is not None and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class Leaderboard:
+    """ユーザーIDごとのスコアを降順に保持するランキング"""
+
+    def __init__(self, expected_size: int = 1_000_000):
+        self._expected_size = expected_size
+        self._scores: Dict[str, int] = {}
+        self._index = IndexableSkipList(expected_size)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    @staticmethod
+    def _key(user_id: str, score: int) -> Tuple[int, str]:
+        # 同点の場合はユーザーID順で安定させる
+        return (-score, user_id)
+
+    def set_score(self, user_id: str, score: int) -> None:
+        old = self._scores.get(user_id)
+        if old == score:
+            return
+        if old is not None:
+            self._index.remove(self._key(user_id, old))
+        self._index.insert(self._key(user_id, score))
+        self._scores[user_id] = score
+
+    def increment(self, user_id: str, delta: int) -> int:
+        score = self._scores.get(user_id, 0) + delta
+        self.set_score(user_id, score)
+        return score
+
+    def remove(self, user_id: str) -> None:
+        score = self._scores.pop(user_id, None)
+        if score is not None:
+            self._index.remove(self._key(user_id, score))
+
+    def score(self, user_id: str) -> Optional[int]:
+        return self._scores.get(user_id)
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """1始まりの順位（未登録なら None）"""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return self._index.index(self._key(user_id, score)) + 1
+
+    def top(self, limit: int, offset: int = 0) -> List[Dict]:
+        keys = self._index.slice(offset, limit)
+        return [
+            {'rank': offset + i + 1, 'user_id': user_id, 'score': -neg_score}
+            for i, (neg_score, user_id) in enumerate(keys)
+        ]
+
+    def clear(self) -> None:
+        self._scores = {}
+        self._index = IndexableSkipList(self._expected_size)
+
+
+# リーダーボードの種類
+BOARDS = ('xp', 'weekly', 'streak')
+
+
+class Leaderboards:
+    """XP・過去7日間の完了数・ストリークの各ランキングをまとめて管理
+
+    いずれも完了イベントのたびに差分更新します。日付は UTC で、gamification の
+    get_weekly_stats / calculate_streak と同じ定義です。
+
+    - weekly: 今日を含む過去7日間の完了数。日ごとの完了数を持ち、7日より前の日の分を
+      読み出し時に差し引く
+    - streak: 最終完了日までの連続日数。最終完了日が昨日より前のユーザーは、
+      読み出し時にランキングから外す（calculate_streak が 0 を返すのと同じ）
+    """
+
+    # weekly が数える日数（今日を含む）
+    WEEKLY_DAYS = 7
+
+    def __init__(self, expected_size: int = 1_000_000):
+        self._lock = threading.Lock()
+        self._boards = {name: Leaderboard(expected_size) for name in BOARDS}
+        # 日付 -> {user_id: その日の完了数}
+        self._daily_counts: Dict[date, Dict[str, int]] = {}
+        # user_id -> 最終完了日 / 最終完了日 -> user_id の集合
+        self._last_completed: Dict[str, date] = {}
+        self._last_completed_users: Dict[date, Set[str]] = {}
+
+    @staticmethod
+    def _utc_date(moment: datetime) -> date:
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc)
+        return moment.date()
+
+    def record_completion(self, user_id: str, xp: int, completed_at: Optional[datetime] = None) -> None:
+        """ポモドーロ完了をランキングへ反映"""
+        day = self._utc_date(completed_at or datetime.now(timezone.utc))
+        with self._lock:
+            self._boards['xp'].increment(user_id, xp)
+
+            counts = self._daily_counts.setdefault(day, {})
+            counts[user_id] = counts.get(user_id, 0) + 1
+            self._boards['weekly'].increment(user_id, 1)
+
+            streaks = self._boards['streak']
+            last = self._last_completed.get(user_id)
+            if last is not None and day <= last:
+                # 最終完了日以前の完了はストリークを変えない
+                return
+            if last == day - timedelta(days=1):
+                streaks.increment(user_id, 1)
+            else:
+                streaks.set_score(user_id, 1)
+            if last is not None:
+                self._last_completed_users[last].discard(user_id)
+            self._last_completed_users.setdefault(day, set()).add(user_id)
+            self._last_completed[user_id] = day
+
+    def _expire(self, today: date) -> None:
+        """期間外になった完了数・途切れたストリークをランキングから除く（ロック取得済みの前提）
+
+        対象は期限切れの日付の分だけなので、日付が変わった直後以外はほぼ何もしません。
+        """
+        weekly = self._boards['weekly']
+        week_start = today - timedelta(days=self.WEEKLY_DAYS - 1)
+        for day in [d for d in self._daily_counts if d < week_start]:
+            for user_id, count in self._daily_counts.pop(day).items():
+                if weekly.increment(user_id, -count) <= 0:
+                    weekly.remove(user_id)
+
+        streaks = self._boards['streak']
+        yesterday = today - timedelta(days=1)
+        for day in [d for d in self._last_completed_users if d < yesterday]:
+            for user_id in self._last_completed_users.pop(day):
+                streaks.remove(user_id)
+                del self._last_completed[user_id]
+
+    def top(self, board: str, limit: int = 10, offset: int = 0) -> Dict:
+        with self._lock:
+            self._expire(self._utc_date(datetime.now(timezone.utc)))
+            lb = self._boards[board]
+            return {
+                'board': board,
+                'total_users': len(lb),
+                'entries': lb.top(limit, offset),
+            }
+
+    def user_rank(self, board: str, user_id: str) -> Optional[Dict]:
+        with self._lock:
+            self._expire(self._utc_date(datetime.now(timezone.utc)))
+            lb = self._boards[board]
+            rank = lb.rank(user_id)
+            if rank is None:
+                return None
+            return {
+                'board': board,
+                'user_id': user_id,
+                'rank': rank,
+                'score': lb.score(user_id),
+                'total_users': len(lb),
+            }
@@ -0,0 +1,117 @@
+"""高速 JSON シリアライズ
+
+orjson がインストールされていればそれを使い、なければ標準ライブラリの json に
+フォールバックする Flask の JSON プロバイダを提供します。
+
+また、バッジの静的メタデータのように毎回同じになるレスポンス断片は
+起動時に一度だけシリアライズしておき、レスポンス生成時はバイト列を連結する
+だけにしています。
+"""
+import json
+from typing import Dict, List
+
+from flask.json.provider import DefaultJSONProvider
+
+from .gamification import BADGE_DEFINITIONS
+
+try:
+    import orjson
+except ImportError:  # 任意依存
+    orjson = None
+
+
+if orjson is not None:
+    # datetime / dataclass は Flask 既定と同じ表現になるよう default に任せる
+    _ORJSON_OPTIONS = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+
+def dumps_bytes(obj, default=None, sort_keys: bool = False) -> bytes:
+    """オブジェクトをコンパクトな UTF-8 の JSON バイト列に変換"""
+    if orjson is not None:
+        option = _ORJSON_OPTIONS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except orjson.JSONEncodeError:
+            # 64bit を超える整数など orjson が扱えない値は標準ライブラリに任せる
+            pass
+    return json.dumps(
+        obj, default=default, sort_keys=sort_keys, ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """orjson を優先して使う JSON プロバイダ（jsonify から利用される）"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            # indent などの指定がある場合は標準の挙動に合わせる
+            return super().dumps(obj, **kwargs)
+        return dumps_bytes(obj, default=self.default, sort_keys=self.sort_keys).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = dumps_bytes(obj, default=self.default, sort_keys=self.sort_keys)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def preserialize(obj) -> bytes:
+    """定数レスポンスを事前にシリアライズ（末尾改行込み）"""
+    return dumps_bytes(obj, sort_keys=True) + b'\n'
+
+
+# 定数レスポンス
+OK_BODY = preserialize({'ok': True})
+ID_REQUIRED_BODY = preserialize({'error': 'id required'})
+NOT_FOUND_BODY = preserialize({'error': 'not found'})
+
+# バッジごとの事前シリアライズ済み断片: '{"description":...,"unlocked_at":'
+BADGE_FRAGMENTS = {
+    badge_id: dumps_bytes(definition, sort_keys=True)[:-1] + b',"unlocked_at":'
+    for badge_id, definition in BADGE_DEFINITIONS.items()
+}
+_BADGE_FIELD_COUNT = 5  # id, name, description, icon, unlocked_at
+
+
+def _is_static_badge(badge: Dict) -> bool:
+    # _badge() はメタデータの値をそのまま共有するので、同一性で安価に判定できる
+    definition = BADGE_DEFINITIONS.get(badge.get('id'))
+    return (
+        definition is not None
+        and len(badge) == _BADGE_FIELD_COUNT
+        and badge.get('name') is definition['name']
+        and badge.get('description') is definition['description']
+        and badge.get('icon') is definition['icon']
+    )
+
+
+def _encode_timestamp(value) -> bytes:
+    """ISO形式の日時文字列は JSON エスケープ不要なのでそのまま囲む"""
+    if value is None:
+        return b'null'
+    if isinstance(value, str) and value.isascii() and value.isprintable() \
+            and '"' not in value and '\\' not in value:
+        return b'"' + value.encode('ascii') + b'"'
+    return dumps_bytes(value)
+
+
+def achievements_body(badges: List[Dict]) -> bytes:
+    """バッジ一覧レスポンスを組み立てる
+
+    orjson がある場合は C 実装で丸ごとシリアライズした方が速いのでそちらを使い、
+    標準ライブラリへのフォールバック時のみ事前シリアライズ断片を連結します。
+    """
+    if orjson is not None:
+        return dumps_bytes({'achievements': badges, 'total_count': len(badges)}) + b'\n'
+    parts = []
+    for badge in badges:
+        if _is_static_badge(badge):
+            parts.append(BADGE_FRAGMENTS[badge['id']] + _encode_timestamp(badge['unlocked_at']) + b'}')
+        else:
+            parts.append(dumps_bytes(badge, sort_keys=True))
+    return b'{"achievements":[%s],"total_count":%d}\n' % (b','.join(parts), len(badges))
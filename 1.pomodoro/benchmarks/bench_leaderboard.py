@@ -0,0 +1,64 @@
+"""リーダーボードのベンチマーク
+
+使い方:
+    python benchmarks/bench_leaderboard.py --users 1000000
+
+スキップリストへの登録、スコア更新、上位K件取得、順位取得の所要時間を
+全件ソートによる素朴な実装と比較します。
+"""
+import argparse
+import pathlib
+import random
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.leaderboard import Leaderboard
+
+
+def _timeit(label, func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f'{label:<32} {elapsed / repeat * 1e6:12.1f} us/op  (x{repeat})')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=10_000)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    user_ids = [f'user{i}' for i in range(args.users)]
+    lb = Leaderboard(expected_size=args.users)
+
+    start = time.perf_counter()
+    for user_id in user_ids:
+        lb.set_score(user_id, rng.randrange(100_000))
+    build = time.perf_counter() - start
+    print(f'build {args.users} users: {build:.2f} s ({build / args.users * 1e6:.1f} us/user)')
+
+    sample = [rng.choice(user_ids) for _ in range(args.queries)]
+    it = iter(sample)
+    _timeit('increment (/api/complete)', lambda: lb.increment(next(it), 10), repeat=args.queries)
+    it = iter(sample)
+    _timeit('rank (my rank)', lambda: lb.rank(next(it)), repeat=args.queries)
+    _timeit(f'top {args.top}', lambda: lb.top(args.top), repeat=args.queries)
+    offsets = iter(rng.randrange(args.users) for _ in range(args.queries))
+    _timeit(f'page of {args.top} at random offset', lambda: lb.top(args.top, next(offsets)), repeat=args.queries)
+
+    # 比較: リクエストごとに全件ソートする素朴な実装
+    scores = dict(lb._scores)
+    _timeit(f'naive sort + top {args.top}',
+            lambda: sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:args.top], repeat=3)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""JSONシリアライズのベンチマーク
+
+使い方:
+    python benchmarks/bench_serialization.py --badges 5000 --days 3650
+
+大きなバッジ一覧と分析ペイロードについて、Flask 既定（標準 json,
+sort_keys, ensure_ascii）と高速パス（orjson / 事前シリアライズ断片）の
+シリアライズコストを比較します。
+"""
+import argparse
+import json
+import pathlib
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import serialization
+from app.gamification import BADGE_DEFINITIONS, _badge
+
+
+def _flask_default(obj) -> bytes:
+    return json.dumps(obj, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def _timeit(label, func, repeat):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        size = len(func())
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f'  {label:<20} {elapsed * 1e6:11.1f} us  {size / 1024:9.1f} KiB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--badges', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=3650)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    backends = [('stdlib', None)]
+    if serialization.orjson is not None:
+        backends.insert(0, ('orjson', serialization.orjson))
+
+    now = datetime.now(timezone.utc)
+    badge_ids = list(BADGE_DEFINITIONS)
+    badges = [
+        _badge(badge_ids[i % len(badge_ids)], (now - timedelta(minutes=i)).isoformat())
+        for i in range(args.badges)
+    ]
+    small = [_badge(badge_id, now.isoformat()) for badge_id in BADGE_DEFINITIONS]
+
+    start = date.today() - timedelta(days=args.days)
+    analytics = {
+        'total_completed': args.days * 4,
+        'total_focus_seconds': args.days * 6000,
+        'average_focus_seconds': 1500,
+        'daily_counts': {(start + timedelta(days=i)).isoformat(): i % 9 for i in range(args.days)},
+        'daily_focus_seconds': {(start + timedelta(days=i)).isoformat(): (i % 9) * 1500 for i in range(args.days)},
+        'completion_rate': 1.33,
+    }
+
+    payloads = [
+        (f'achievements ({len(small)} badges)', small, args.repeat * 500),
+        (f'achievements ({args.badges} badges)', badges, args.repeat),
+    ]
+    for backend, module in backends:
+        serialization.orjson = module
+        print(f'[{backend}]')
+        for label, items, repeat in payloads:
+            print(label)
+            payload = {'achievements': items, 'total_count': len(items)}
+            _timeit('flask default', lambda: _flask_default(payload), repeat)
+            _timeit('fast dumps', lambda: serialization.dumps_bytes(payload, sort_keys=True), repeat)
+            _timeit('achievements_body', lambda: serialization.achievements_body(items), repeat)
+        print(f'analytics ({args.days} days)')
+        _timeit('flask default', lambda: _flask_default(analytics), args.repeat)
+        _timeit('fast dumps', lambda: serialization.dumps_bytes(analytics, sort_keys=True), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
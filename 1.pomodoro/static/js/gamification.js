@@ -24,12 +24,17 @@ class GamificationUI {
     await this.loadAchievements();
     await this.loadWeeklyStats();
     
-    // 定期更新（30秒ごと）
-    setInterval(() => {
+    // 定期更新（30秒ごと）。非表示タブでは停止し、復帰時にすぐ再取得する
+    const refresh = () => {
       this.loadGamificationStats();
       this.loadAchievements();
       this.loadWeeklyStats();
-    }, 30000);
+    };
+    if (window.appScheduler) {
+      window.appScheduler.every(30000, refresh);
+    } else {
+      setInterval(refresh, 30000);
+    }
   }
   
   async loadGamificationStats() {
@@ -0,0 +1,124 @@
+// Visibility-aware scheduler. Rendering runs on requestAnimationFrame only while
+// the page is visible; periodic tasks are suspended while hidden and run again
+// on resume. Environment hooks are injectable for testability.
+class Scheduler {
+  constructor(options = {}) {
+    this.doc = options.document || (typeof document !== 'undefined' ? document : null)
+    this.raf = options.requestAnimationFrame || ((cb) => requestAnimationFrame(cb))
+    this.caf = options.cancelAnimationFrame || ((id) => cancelAnimationFrame(id))
+    this.setTimer = options.setTimeout || ((fn, ms) => setTimeout(fn, ms))
+    this.clearTimer = options.clearTimeout || ((id) => clearTimeout(id))
+    this.now = options.now || (() => Date.now()) // ms
+
+    this._frameFn = null
+    this._rafId = null
+    this._tasks = new Set()
+    this._resumeListeners = []
+    this._hideListeners = []
+    this._tick = this._tick.bind(this)
+
+    if (this.doc) {
+      this.doc.addEventListener('visibilitychange', () => this._onVisibilityChange())
+    }
+  }
+
+  isVisible() {
+    return !this.doc || this.doc.visibilityState !== 'hidden'
+  }
+
+  // Call fn on every animation frame until stopFrames(); paused while hidden.
+  startFrames(fn) {
+    this._frameFn = fn
+    this._requestFrame()
+  }
+
+  stopFrames() {
+    this._frameFn = null
+    if (this._rafId !== null) {
+      this.caf(this._rafId)
+      this._rafId = null
+    }
+  }
+
+  framesActive() { return this._rafId !== null }
+
+  _requestFrame() {
+    if (this._rafId === null && this._frameFn && this.isVisible()) {
+      this._rafId = this.raf(this._tick)
+    }
+  }
+
+  _tick(ts) {
+    this._rafId = null
+    if (!this._frameFn || !this.isVisible()) return
+    this._frameFn(ts)
+    this._requestFrame()
+  }
+
+  // Run fn every intervalMs while visible. Returns a function that cancels it.
+  every(intervalMs, fn) {
+    const task = { intervalMs, fn, timerId: null, lastRun: this.now() }
+    this._tasks.add(task)
+    this._scheduleTask(task, intervalMs)
+    return () => {
+      this._unscheduleTask(task)
+      this._tasks.delete(task)
+    }
+  }
+
+  _scheduleTask(task, delayMs) {
+    if (!this.isVisible()) return
+    task.timerId = this.setTimer(() => this._runTask(task), Math.max(0, delayMs))
+  }
+
+  _unscheduleTask(task) {
+    if (task.timerId !== null) {
+      this.clearTimer(task.timerId)
+      task.timerId = null
+    }
+  }
+
+  _runTask(task) {
+    task.timerId = null
+    task.lastRun = this.now()
+    task.fn()
+    this._scheduleTask(task, task.intervalMs)
+  }
+
+  onResume(fn) { this._resumeListeners.push(fn) }
+
+  onHide(fn) { this._hideListeners.push(fn) }
+
+  _onVisibilityChange() {
+    if (!this.isVisible()) {
+      if (this._rafId !== null) {
+        this.caf(this._rafId)
+        this._rafId = null
+      }
+      this._tasks.forEach((task) => this._unscheduleTask(task))
+      this._hideListeners.forEach((fn) => fn())
+      return
+    }
+    // resync first so the first frame after resume renders fresh state
+    this._resumeListeners.forEach((fn) => fn())
+    this._tasks.forEach((task) => {
+      this._unscheduleTask(task)
+      const elapsed = this.now() - task.lastRun
+      if (elapsed >= task.intervalMs) {
+        this._runTask(task)
+      } else {
+        this._scheduleTask(task, task.intervalMs - elapsed)
+      }
+    })
+    this._requestFrame()
+  }
+}
+
+// Node/CommonJS export
+if (typeof module !== 'undefined' && module.exports) {
+  module.exports = Scheduler
+} else {
+  // browser global (shared instance for all UI modules)
+  window.Scheduler = Scheduler
+  window.appScheduler = new Scheduler()
+}
@@ -0,0 +1,108 @@
+const Scheduler = require('./scheduler')
+
+// Minimal fake environment: manual clock, timers, animation frames and document.
+function makeEnv() {
+  const env = {
+    now: 0,
+    timers: new Map(),
+    frames: new Map(),
+    nextId: 1,
+    listeners: {},
+    document: {
+      visibilityState: 'visible',
+      addEventListener: (type, fn) => { env.listeners[type] = fn },
+    },
+  }
+  env.options = {
+    document: env.document,
+    now: () => env.now,
+    setTimeout: (fn, ms) => { const id = env.nextId++; env.timers.set(id, { fn, at: env.now + ms }); return id },
+    clearTimeout: (id) => { env.timers.delete(id) },
+    requestAnimationFrame: (fn) => { const id = env.nextId++; env.frames.set(id, fn); return id },
+    cancelAnimationFrame: (id) => { env.frames.delete(id) },
+  }
+  env.advance = (ms) => {
+    env.now += ms
+    for (const [id, t] of [...env.timers]) {
+      if (t.at <= env.now) {
+        env.timers.delete(id)
+        t.fn()
+      }
+    }
+  }
+  env.frame = () => {
+    const pending = [...env.frames]
+    env.frames.clear()
+    pending.forEach(([, fn]) => fn(env.now))
+  }
+  env.setVisibility = (state) => {
+    env.document.visibilityState = state
+    env.listeners.visibilitychange()
+  }
+  return env
+}
+
+describe('Scheduler', () => {
+  test('runs frame callback only while started and visible', () => {
+    const env = makeEnv()
+    const s = new Scheduler(env.options)
+    let calls = 0
+    s.startFrames(() => { calls++ })
+    env.frame()
+    env.frame()
+    expect(calls).toBe(2)
+
+    env.setVisibility('hidden')
+    expect(env.frames.size).toBe(0)
+    env.frame()
+    expect(calls).toBe(2)
+
+    env.setVisibility('visible')
+    env.frame()
+    expect(calls).toBe(3)
+
+    s.stopFrames()
+    expect(s.framesActive()).toBe(false)
+    env.frame()
+    expect(calls).toBe(3)
+  })
+
+  test('suspends periodic tasks while hidden and catches up on resume', () => {
+    const env = makeEnv()
+    const s = new Scheduler(env.options)
+    let runs = 0
+    s.every(1000, () => { runs++ })
+    env.advance(1000)
+    expect(runs).toBe(1)
+
+    env.setVisibility('hidden')
+    expect(env.timers.size).toBe(0)
+    env.advance(10000)
+    expect(runs).toBe(1)
+
+    // overdue task runs immediately on resume, then keeps its interval
+    env.setVisibility('visible')
+    expect(runs).toBe(2)
+    env.advance(1000)
+    expect(runs).toBe(3)
+  })
+
+  test('resume listeners fire before the first frame and cancel stops a task', () => {
+    const env = makeEnv()
+    const s = new Scheduler(env.options)
+    const order = []
+    s.onHide(() => order.push('hide'))
+    s.onResume(() => order.push('resume'))
+    s.startFrames(() => order.push('frame'))
+    const cancel = s.every(500, () => order.push('task'))
+
+    env.setVisibility('hidden')
+    env.setVisibility('visible')
+    env.frame()
+    expect(order).toEqual(['hide', 'resume', 'frame'])
+
+    cancel()
+    env.advance(5000)
+    expect(order).not.toContain('task')
+  })
+})
@@ -26,7 +26,12 @@ document.addEventListener('DOMContentLoaded', () => {
   const TimerCtor = window.TimerLogic
   const timer = new TimerCtor(FULL_SECONDS, { now: () => Date.now() })
 
+  // 表示中のみ requestAnimationFrame で描画するスケジューラ（scheduler.js）
+  const scheduler = window.appScheduler
+
   let currentPomodoroId = null
+  let lastRenderedSec = null
+  let hiddenDeadline = null
 
   function formatTime(sec){
     const m = String(Math.floor(sec/60)).padStart(2,'0');
@@ -34,19 +39,33 @@ document.addEventListener('DOMContentLoaded', () => {
     return `${m}:${s}`;
   }
 
-  function updateUI(){
+  // 表示秒が変わったときだけ DOM を更新する（force で強制更新）
+  function updateUI(force = false){
     const remSec = Math.max(0, timer.remainingSecRounded())
-    timeLabel.textContent = formatTime(remSec)
-    const circumference = 2 * Math.PI * 52
-    const progress = 1 - (remSec / FULL_SECONDS)
-    const offset = circumference * (1 - progress)
-    ring.style.strokeDashoffset = offset
+    if (force || remSec !== lastRenderedSec) {
+      lastRenderedSec = remSec
+      timeLabel.textContent = formatTime(remSec)
+      const circumference = 2 * Math.PI * 52
+      const progress = 1 - (remSec / FULL_SECONDS)
+      const offset = circumference * (1 - progress)
+      ring.style.strokeDashoffset = offset
+    }
 
     // タイマー完了チェック
     if (remSec === 0 && timer.isRunning()) {
       handlePomodoroComplete()
       timer.pause()
       startBtn.textContent = '開始'
+      syncRenderLoop()
+    }
+  }
+
+  // タイマー動作中のみフレーム描画を回す（停止中は操作時にだけ描画）
+  function syncRenderLoop(){
+    if (timer.isRunning()) {
+      scheduler.startFrames(() => updateUI())
+    } else {
+      scheduler.stopFrames()
     }
   }
 
@@ -92,8 +111,19 @@ document.addEventListener('DOMContentLoaded', () => {
     }
   }
 
-  // periodic UI update
-  setInterval(updateUI, 250)
+  // 非表示中は描画を止め、完了判定だけ残り時間後の1回のタイマーで行う
+  scheduler.onHide(() => {
+    if (timer.isRunning()) {
+      hiddenDeadline = setTimeout(() => updateUI(), timer.remainingMs())
+    }
+  })
+
+  // 復帰時は timer_logic の状態（実時刻ベース）から再描画する
+  scheduler.onResume(() => {
+    clearTimeout(hiddenDeadline)
+    hiddenDeadline = null
+    updateUI(true)
+  })
 
   startBtn.addEventListener('click', ()=>{
     if(timer.isRunning()){
@@ -111,14 +141,16 @@ document.addEventListener('DOMContentLoaded', () => {
         startPomodoro()
       }
     }
-    updateUI()
+    updateUI(true)
+    syncRenderLoop()
   })
 
   resetBtn.addEventListener('click', ()=>{
     timer.reset()
     startBtn.textContent = '開始'
     currentPomodoroId = null
-    updateUI()
+    updateUI(true)
+    syncRenderLoop()
   })
 
   // 設定パネルの開閉
@@ -227,5 +259,5 @@ document.addEventListener('DOMContentLoaded', () => {
   const circumference = 2 * Math.PI * 52
   ring.style.strokeDasharray = `${circumference}`
   ring.style.strokeDashoffset = `${circumference}`
-  updateUI()
+  updateUI(true)
 })
@@ -0,0 +1,100 @@
+"""静的アセットパイプラインのテスト"""
+import gzip
+
+from app import create_app
+from app.assets import minify_css, minify_js
+
+
+def _bundle_url(client, bundle):
+    return f"/assets/{client.application.extensions['assets'].assets[bundle].filename}"
+
+
+def test_minify_js_keeps_strings():
+    """コメントは削除し、文字列内の // はそのまま残すことをテスト"""
+    source = """
+    // comment
+    const url = 'http://example.com' // trailing
+    /* block */
+    const tpl = `a // b`
+    """
+    assert minify_js(source) == "const url = 'http://example.com'\nconst tpl = `a // b`\n"
+
+
+def test_minify_js_keeps_literals_verbatim():
+    """テンプレートリテラル（入れ子を含む）と正規表現リテラルの中身を変更しないことをテスト"""
+    template = """`
+      <div title="${a ? `x ${b} // y` : '}'}">
+        ${c}
+      </div>
+    `"""
+    source = f"""
+    el.innerHTML = {template}  /* note */
+    const re = /["'`]\\/[/]/g; const half = total / 2 / count
+    if (ok) return /a'b/.test(s)
+    """
+    assert minify_js(source) == (
+        f"el.innerHTML = {template}\n"
+        "const re = /[\"'`]\\/[/]/g; const half = total / 2 / count\n"
+        "if (ok) return /a'b/.test(s)\n"
+    )
+
+
+def test_minify_css_keeps_literals_verbatim():
+    """CSSの文字列と url() の中身を変更しないことをテスト"""
+    source = """
+    .q::before {
+      content: "a,  >  b" ;  /* note */
+      background: url( "x  y.png" ) , url(a,  b.png);
+      font-family: 'A  /* no */ B';
+    }
+    """
+    assert minify_css(source) == (
+        '.q::before{content: "a,  >  b";'
+        'background: url( "x  y.png" ),url(a,  b.png);'
+        "font-family: 'A  /* no */ B'}\n"
+    )
+
+
+def test_minify_css():
+    """CSSのコメントと空白の削除をテスト"""
+    source = "/* c */\n.a > .b {\n  color: red;\n  margin: 0 auto;\n}\n"
+    assert minify_css(source) == '.a>.b{color: red;margin: 0 auto}\n'
+
+
+def test_bundle_cache_headers(client):
+    """フィンガープリント付きバンドルが長期キャッシュ・圧縮で配信されることをテスト"""
+    url = _bundle_url(client, 'app.js')
+    resp = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert resp.status_code == 200
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in resp.headers['Cache-Control']
+    assert resp.headers['Vary'] == 'Accept-Encoding'
+    assert b'class TimerLogic' in gzip.decompress(resp.get_data())
+
+    plain = client.get(url)
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.get_data() == gzip.decompress(resp.get_data())
+
+    revalidate = client.get(url, headers={'If-None-Match': plain.headers['ETag']})
+    assert revalidate.status_code == 304
+
+    assert client.get('/assets/app.0000000000.js').status_code == 404
+
+
+def test_css_bundle(client):
+    """CSSバンドルの配信をテスト"""
+    resp = client.get(_bundle_url(client, 'app.css'))
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/css'
+    assert '.progress-ring' in resp.get_data(as_text=True)
+
+
+def test_bundling_disabled():
+    """バンドル無効時は元のファイルを個別に読み込むことをテスト"""
+    app = create_app({'TESTING': True, 'ASSET_BUNDLING': False})
+    data = app.test_client().get('/').get_data(as_text=True)
+    assert '/static/css/styles.css' in data
+    assert '/static/js/settings.js' in data
+    assert '/static/js/timer_logic.js' in data
+    assert '/static/js/timer_ui.js' in data
+    assert '/assets/' not in data
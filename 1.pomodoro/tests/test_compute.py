@@ -0,0 +1,197 @@
+"""プロセスプールによる再計算のテスト"""
+import os
+import signal
+import time
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from app.compute import CompletedColumns, ComputeExecutor, pack_completed, unpack_completed
+from app.compute import JOB_KINDS, JobQueueFullError
+from app.gamification import check_achievements, calculate_streak, get_monthly_stats
+
+
+def _make_store(days=3):
+    now = datetime.now(timezone.utc)
+    store = []
+    for i in range(days):
+        date = now - timedelta(days=i)
+        store.append({
+            'id': i + 1,
+            'start_time': date.replace(hour=10, minute=0).isoformat(),
+            'end_time': date.replace(hour=10, minute=25).isoformat(),
+            'duration_sec': 1500,
+            'status': 'completed',
+            'type': 'work',
+        })
+    store.append({
+        'id': days + 1,
+        'start_time': now.isoformat(),
+        'end_time': None,
+        'duration_sec': None,
+        'status': 'running',
+        'type': 'work',
+    })
+    return store
+
+
+def test_pack_roundtrip():
+    """共有メモリ配列への詰め替えで集計結果が変わらないことをテスト"""
+    store = _make_store()
+    shm, n = pack_completed(CompletedColumns.from_store(store))
+    try:
+        records = unpack_completed(shm.buf, n)
+    finally:
+        shm.close()
+        shm.unlink()
+
+    assert n == 3
+    assert [r['duration_sec'] for r in records] == [1500, 1500, 1500]
+    assert calculate_streak(records) == calculate_streak(store[:3])
+    assert get_monthly_stats(records) == get_monthly_stats(store)
+
+
+def test_executor_matches_inline():
+    """ワーカーでの再計算結果がインライン計算と一致することをテスト"""
+    store = _make_store()
+    columns = CompletedColumns.from_store(store)
+    executor = ComputeExecutor(max_workers=1)
+    try:
+        badges = executor.run('achievements', columns, timeout=60)
+        streak = executor.run('streak', columns, timeout=60)
+    finally:
+        executor.shutdown()
+
+    expected_ids = [b['id'] for b in check_achievements(store)]
+    assert [b['id'] for b in badges] == expected_ids
+    assert streak == {'streak_days': 3}
+
+
+def test_columns_follow_completions(client):
+    """列配列が /api/complete で差分更新され、ワーカー側でストア順に戻ることをテスト"""
+    store = client.application.config['POMODORO_STORE']
+    store.extend(_make_store(days=2))
+    client.application.config['POMODORO_NEXT_ID'] = len(store) + 1
+    first = client.post('/api/start', json={}).get_json()['id']
+    second = client.post('/api/start', json={}).get_json()['id']
+    columns = client.application.extensions['completed_columns']
+    columns.sync(store)
+    assert len(columns) == 2
+
+    # 後から開始した方を先に完了させる
+    client.post('/api/complete', json={'id': second})
+    client.post('/api/complete', json={'id': 3})
+    client.post('/api/complete', json={'id': first})
+    assert len(columns) == 5
+
+    shm, n = pack_completed(columns)
+    try:
+        records = unpack_completed(shm.buf, n)
+    finally:
+        shm.close()
+        shm.unlink()
+    completed = [r for r in store if r['status'] == 'completed']
+    assert [r['duration_sec'] for r in records] == [r['duration_sec'] for r in completed]
+    assert [datetime.fromisoformat(r['end_time']) for r in records] == \
+        [datetime.fromisoformat(r['end_time']) for r in completed]
+
+
+def test_job_endpoints(client):
+    """再計算ジョブAPIのテスト"""
+    client.application.config['POMODORO_STORE'].extend(_make_store())
+
+    resp = client.post('/api/gamification/jobs', json={'kind': 'unknown'})
+    assert resp.status_code == 400
+
+    resp = client.post('/api/gamification/jobs', json={'kind': 'streak'})
+    assert resp.status_code == 202
+    job_id = resp.get_json()['id']
+
+    deadline = time.time() + 60
+    while True:
+        data = client.get(f'/api/gamification/jobs/{job_id}').get_json()
+        if data['state'] in ('done', 'failed') or time.time() > deadline:
+            break
+        time.sleep(0.05)
+    client.application.extensions['compute_executor'].shutdown()
+
+    assert data['state'] == 'done'
+    assert data['result'] == {'streak_days': 3}
+    assert client.get('/api/gamification/jobs/9999').status_code == 404
+
+
+def test_job_submissions_are_capped(client):
+    """未完了のジョブが上限に達したら共有メモリを確保せずに断る"""
+    client.application.config['POMODORO_STORE'].extend(_make_store())
+    executor = client.application.extensions['compute_executor']
+    executor.max_pending = 0
+
+    resp = client.post('/api/gamification/jobs', json={'kind': 'streak'})
+    assert resp.status_code == 503
+    assert resp.headers['Retry-After']
+    assert executor._pending == 0 and executor._pool is None
+
+    executor.max_pending = 1
+    columns = CompletedColumns.from_store(_make_store())
+    try:
+        job_id = executor.submit('streak', columns)
+        with pytest.raises(JobQueueFullError):
+            executor.submit('streak', columns)
+        executor._jobs[job_id][1].result(timeout=60)
+        deadline = time.time() + 5
+        while executor._pending and time.time() < deadline:
+            time.sleep(0.01)
+        # 終わった分だけ再び投入できる
+        executor.run('streak', columns, timeout=60)
+    finally:
+        executor.shutdown()
+
+
+
+def test_roundtrip_preserves_offsets():
+    """オフセットの異なるレコード・naive なレコードでも、往復後の集計がインラインと一致することをテスト"""
+    now = datetime.now(timezone.utc)
+    zones = [timezone.utc, timezone(timedelta(hours=9)), timezone(timedelta(hours=-5, minutes=-30)), None]
+    store = []
+    for i in range(40):
+        end = (now - timedelta(hours=7 * i, microseconds=i)).astimezone(zones[i % 4] or timezone.utc)
+        if zones[i % 4] is None:
+            end = end.replace(tzinfo=None)
+        store.append({'id': i + 1, 'end_time': end.isoformat(), 'duration_sec': 1500, 'status': 'completed'})
+    store.append({'id': 41, 'end_time': None, 'duration_sec': None, 'status': 'completed'})
+
+    shm, n = pack_completed(CompletedColumns.from_store(store))
+    try:
+        records = unpack_completed(shm.buf, n)
+    finally:
+        shm.close()
+        shm.unlink()
+
+    assert [r['end_time'] for r in records] == [r['end_time'] for r in store]
+    for kind, func in JOB_KINDS.items():
+        if kind == 'achievements':
+            continue
+        assert func(records) == func(store), kind
+    # 獲得日時が「現在」のバッジ以外は unlocked_at まで一致する
+    first = [b for b in check_achievements(records) if b['id'] == 'first_pomodoro']
+    assert first == [b for b in check_achievements(store) if b['id'] == 'first_pomodoro']
+    assert [b['id'] for b in check_achievements(records)] == [b['id'] for b in check_achievements(store)]
+
+
+def test_pool_recovers_after_worker_dies():
+    """ワーカーが強制終了されても、次の投入でプールが作り直されることをテスト"""
+    columns = CompletedColumns.from_store(_make_store())
+    executor = ComputeExecutor(max_workers=1)
+    try:
+        assert executor.run('streak', columns, timeout=60) == {'streak_days': 3}
+        for pid in list(executor._pool._processes):
+            os.kill(pid, signal.SIGKILL)
+        deadline = time.time() + 30
+        while executor._pool._broken is False and time.time() < deadline:
+            time.sleep(0.05)
+
+        job_id = executor.submit('streak', columns)
+        executor._jobs[job_id][1].result(timeout=60)
+        assert executor.status(job_id)['result'] == {'streak_days': 3}
+    finally:
+        executor.shutdown()
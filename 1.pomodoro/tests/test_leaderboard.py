@@ -0,0 +1,108 @@
+"""リーダーボード機能のテスト"""
+import random
+from datetime import datetime, timezone, timedelta
+
+from app.leaderboard import IndexableSkipList, Leaderboard, Leaderboards
+
+
+def test_skiplist_matches_sorted_list():
+    """スキップリストの順序・位置がソート済みリストと一致することをテスト"""
+    rng = random.Random(42)
+    skiplist = IndexableSkipList(expected_size=1000)
+    reference = []
+    for _ in range(2000):
+        key = rng.randrange(500)
+        if key in reference and rng.random() < 0.5:
+            skiplist.remove(key)
+            reference.remove(key)
+        elif key not in reference:
+            skiplist.insert(key)
+            reference.append(key)
+    reference.sort()
+
+    assert len(skiplist) == len(reference)
+    assert skiplist.slice(0, len(reference)) == reference
+    assert skiplist.slice(10, 5) == reference[10:15]
+    for i, key in enumerate(reference):
+        assert skiplist.index(key) == i
+
+
+def test_leaderboard_rank_and_top():
+    """スコア更新後の順位と上位取得のテスト"""
+    lb = Leaderboard(expected_size=100)
+    lb.set_score('alice', 30)
+    lb.set_score('bob', 50)
+    lb.set_score('carol', 10)
+    lb.increment('carol', 50)
+
+    assert lb.rank('carol') == 1
+    assert lb.rank('bob') == 2
+    assert lb.rank('alice') == 3
+    assert lb.rank('dave') is None
+    assert [e['user_id'] for e in lb.top(2)] == ['carol', 'bob']
+    assert lb.top(2, offset=2) == [{'rank': 3, 'user_id': 'alice', 'score': 30}]
+
+
+def test_streak_board():
+    """連続日数ランキングのテスト"""
+    boards = Leaderboards(expected_size=100)
+    today = datetime.now(timezone.utc)
+    for i in range(3):
+        boards.record_completion('alice', 10, today - timedelta(days=2 - i))
+    boards.record_completion('alice', 10, today)
+    boards.record_completion('bob', 10, today)
+
+    alice = boards.user_rank('streak', 'alice')
+    assert alice['rank'] == 1
+    assert alice['score'] == 3
+    assert boards.user_rank('xp', 'alice')['score'] == 40
+
+
+def test_expired_streak_and_weekly_window():
+    """途切れたストリークは圏外になり、weekly は過去7日間だけを数えることをテスト"""
+    boards = Leaderboards(expected_size=100)
+    now = datetime.now(timezone.utc)
+    for i in range(5):
+        boards.record_completion('idle', 10, now - timedelta(days=20 - i))
+    boards.record_completion('idle', 10, now - timedelta(days=7))
+    boards.record_completion('active', 10, now - timedelta(days=1))
+    boards.record_completion('active', 10, now - timedelta(days=6))
+
+    assert boards.user_rank('streak', 'idle') is None
+    assert boards.user_rank('streak', 'active')['rank'] == 1
+    assert [e['user_id'] for e in boards.top('streak')['entries']] == ['active']
+
+    assert boards.user_rank('weekly', 'idle') is None
+    assert boards.user_rank('weekly', 'active')['score'] == 2
+    assert boards.user_rank('xp', 'idle')['score'] == 60
+
+    # 途切れた後の完了は 1 日目から数え直す
+    boards.record_completion('idle', 10, now)
+    assert boards.user_rank('streak', 'idle')['score'] == 1
+
+
+def test_leaderboard_endpoints(client):
+    """リーダーボードAPIのテスト"""
+    for user_id, count in (('alice', 2), ('bob', 3)):
+        for _ in range(count):
+            resp = client.post('/api/start', json={'type': 'work', 'user_id': user_id})
+            pid = resp.get_json()['id']
+            # 完了リクエストの user_id では他のユーザーに付け替えられない
+            client.post('/api/complete', json={'id': pid, 'user_id': 'mallory'})
+
+    resp = client.get('/api/leaderboard/xp')
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['total_users'] == 2
+    assert [e['user_id'] for e in data['entries']] == ['bob', 'alice']
+    assert data['entries'][0]['score'] == 30
+
+    resp = client.get('/api/leaderboard/weekly/users/alice')
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['rank'] == 2
+    assert data['score'] == 2
+
+    assert client.get('/api/leaderboard/unknown').status_code == 404
+    assert client.get('/api/leaderboard/xp/users/nobody').status_code == 404
+    assert client.get('/api/leaderboard/xp/users/mallory').status_code == 404
@@ -0,0 +1,63 @@
+"""JSONシリアライズのテスト"""
+import json
+from datetime import datetime, timezone
+
+from app import serialization
+from app.gamification import BADGE_DEFINITIONS, check_achievements
+
+
+def _badges():
+    now = datetime.now(timezone.utc).isoformat()
+    badges = [dict(d, unlocked_at=now) for d in BADGE_DEFINITIONS.values()]
+    badges.append({'id': 'custom', 'name': 'カスタム', 'unlocked_at': None})
+    return badges
+
+
+def test_achievements_body_matches_json():
+    """事前シリアライズ断片から組み立てた結果が通常のシリアライズと一致することをテスト"""
+    badges = _badges()
+    body = serialization.achievements_body(badges)
+    assert json.loads(body) == {'achievements': badges, 'total_count': len(badges)}
+    assert json.loads(serialization.achievements_body([])) == {'achievements': [], 'total_count': 0}
+
+
+def test_stdlib_fallback(monkeypatch):
+    """orjson が無い環境でも同じJSONを返すことをテスト"""
+    payload = {'b': [1, 2.5, None], 'a': 'ポモドーロ', 'n': 2 ** 70}
+    fast = serialization.dumps_bytes(payload, sort_keys=True)
+    monkeypatch.setattr(serialization, 'orjson', None)
+    fallback = serialization.dumps_bytes(payload, sort_keys=True)
+    assert json.loads(fast) == json.loads(fallback) == payload
+
+    badges = _badges()
+    assert json.loads(serialization.achievements_body(badges))['achievements'] == badges
+
+
+def test_jsonify_uses_fast_provider(app):
+    """jsonify が高速プロバイダ経由でも Flask 既定と同じ値を返すことをテスト"""
+    assert isinstance(app.json, serialization.FastJSONProvider)
+    with app.app_context():
+        from flask import jsonify
+        when = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        resp = jsonify({'when': when, 'name': 'テスト'})
+    data = json.loads(resp.get_data())
+    assert data == {'when': 'Fri, 02 Jan 2026 03:04:05 GMT', 'name': 'テスト'}
+
+
+def test_achievements_endpoint_payload(client):
+    """バッジAPIのレスポンス形式が変わらないことをテスト"""
+    resp = client.post('/api/start', json={'type': 'work'})
+    client.post('/api/complete', json={'id': resp.get_json()['id']})
+
+    resp = client.get('/api/gamification/achievements')
+    assert resp.status_code == 200
+    assert resp.mimetype == 'application/json'
+    data = resp.get_json()
+    store = client.application.config['POMODORO_STORE']
+    assert data['achievements'] == check_achievements(store)
+    assert data['achievements'][0]['name'] == '初めてのポモドーロ'
+    assert data['total_count'] == 1
+
+    resp = client.post('/api/complete', json={})
+    assert resp.status_code == 400
+    assert resp.get_json() == {'error': 'id required'}
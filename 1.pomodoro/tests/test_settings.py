@@ -44,10 +44,15 @@ def test_index_includes_settings(client):
 
 
 def test_settings_script_loaded(client):
-    """設定スクリプトが正しくロードされることを確認"""
+    """設定スクリプトがバンドルに含まれてロードされることを確認"""
     resp = client.get('/')
     assert resp.status_code == 200
     data = resp.get_data(as_text=True)
-    assert '/static/js/settings.js' in data
-    assert '/static/js/timer_logic.js' in data
-    assert '/static/js/timer_ui.js' in data
+    pipeline = client.application.extensions['assets']
+    bundle_url = f"/assets/{pipeline.assets['app.js'].filename}"
+    assert bundle_url in data
+
+    bundle = client.get(bundle_url).get_data(as_text=True)
+    assert 'class Settings' in bundle
+    assert 'class TimerLogic' in bundle
+    assert 'class GamificationUI' in bundle
@@ -0,0 +1,364 @@
+"""CLI ブリッジ（asyncio + PTY）
+
+Copilot CLI を PTY 上の子プロセスとして起動し、出力をブラウザ向けのフレームに
+まとめて配信します。
+
+- PTY はノンブロッキングで読み、再利用する固定長バッファに `os.readv` で読み込む
+- 細かい書き込みのバーストは 1 つのフレームに結合し、サイズ（frame_max_bytes）か
+  時間（flush_interval）のどちらかに達したら送信する
+- クライアントごとの送信キューは上限付き。どれかが満杯になると PTY の読み取りを
+  止め、子プロセス側（カーネルの PTY バッファ）で待たせる。遅いブラウザがいても
+  サーバーのメモリは `client_queue_frames × frame_max_bytes` 程度で頭打ちになる
+- 送信したフレームは Scrollback にも書き込み、出力の通し番号（seq）で再送できるようにする
+"""
+import asyncio
+import errno
+import fcntl
+import os
+import pty
+import struct
+import termios
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from .config import BridgeConfig
+from .scrollback import Scrollback
+
+
+def _set_winsize(fd: int, cols: int, rows: int) -> None:
+    fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack('HHHH', rows, cols, 0, 0))
+
+
+def _make_controlling_tty() -> None:
+    # 子プロセス内（fork 後・exec 前）で実行: stdin の PTY を制御端末にする
+    fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+
+
+class PtyProcess:
+    """PTY に接続された子プロセス"""
+
+    def __init__(self, proc: asyncio.subprocess.Process, master_fd: int):
+        self.proc = proc
+        self.master_fd = master_fd
+
+    @classmethod
+    async def spawn(cls, argv: List[str], cols: int = 120, rows: int = 40,
+                    env: Optional[dict] = None, preexec_fn: Optional[Callable] = None,
+                    cwd: Optional[str] = None) -> 'PtyProcess':
+        """PTY を作成して argv を起動する（起動失敗時は OSError）"""
+        master_fd, slave_fd = pty.openpty()
+        try:
+            _set_winsize(master_fd, cols, rows)
+            child_env = dict(os.environ if env is None else env)
+            child_env.setdefault('TERM', 'xterm-256color')
+
+            def _preexec():
+                _make_controlling_tty()
+                if preexec_fn is not None:
+                    preexec_fn()
+
+            proc = await asyncio.create_subprocess_exec(
+                *argv,
+                stdin=slave_fd, stdout=slave_fd, stderr=slave_fd,
+                env=child_env, cwd=cwd,
+                start_new_session=True,
+                preexec_fn=_preexec,
+            )
+        except BaseException:
+            os.close(master_fd)
+            raise
+        finally:
+            os.close(slave_fd)
+        os.set_blocking(master_fd, False)
+        return cls(proc, master_fd)
+
+    @property
+    def pid(self) -> int:
+        return self.proc.pid
+
+    def resize(self, cols: int, rows: int) -> None:
+        _set_winsize(self.master_fd, cols, rows)
+
+    def terminate(self) -> None:
+        if self.proc.returncode is None:
+            try:
+                self.proc.terminate()
+            except ProcessLookupError:
+                pass
+
+    def kill(self) -> None:
+        if self.proc.returncode is None:
+            try:
+                self.proc.kill()
+            except ProcessLookupError:
+                pass
+
+    async def wait(self) -> int:
+        return await self.proc.wait()
+
+    def close(self) -> None:
+        if self.master_fd >= 0:
+            os.close(self.master_fd)
+            self.master_fd = -1
+
+
+class ClientChannel:
+    """1 クライアント分の上限付き送信キュー
+
+    キューが low_water 以下まで減ると on_drain を呼び、ブリッジに読み取り再開を促します。
+    seq は取り出し済みフレームの末尾の通し番号です。
+    """
+
+    def __init__(self, maxsize: int, low_water: int, on_drain: Callable[[], None], seq: int = 0):
+        self.maxsize = maxsize
+        self.low_water = low_water
+        self._on_drain = on_drain
+        self._frames = deque()
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.reason = None
+        self.seq = seq
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def full(self) -> bool:
+        return len(self._frames) >= self.maxsize
+
+    def put(self, frame: bytes) -> None:
+        self._frames.append(frame)
+        self._ready.set()
+
+    def close(self, reason: Optional[str] = None) -> None:
+        self.closed = True
+        self.reason = reason
+        self._ready.set()
+
+    async def get(self) -> Optional[bytes]:
+        """次のフレーム（クローズ済みで空なら None）"""
+        while not self._frames:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        frame = self._frames.popleft()
+        self.seq += len(frame)
+        if len(self._frames) <= self.low_water:
+            self._on_drain()
+        return frame
+
+
+@dataclass
+class BridgeStats:
+    reads: int = 0
+    bytes_read: int = 0
+    frames: int = 0
+    pauses: int = 0
+    evictions: int = 0
+
+
+class PtyBridge:
+    """PTY 出力を結合フレームとしてクライアントへ配信する"""
+
+    def __init__(self, process: PtyProcess, config: BridgeConfig,
+                 scrollback: Optional[Scrollback] = None):
+        self.process = process
+        self.config = config
+        self.scrollback = scrollback
+        # 送信済みフレームの末尾の通し番号
+        self.seq = scrollback.end_seq if scrollback is not None else 0
+        self.stats = BridgeStats()
+        self._loop = asyncio.get_running_loop()
+        self._channels: List[ClientChannel] = []
+        self._read_buf = bytearray(config.read_chunk)
+        self._read_view = memoryview(self._read_buf)
+        self._pending = bytearray()
+        self._flush_handle = None
+        self._reading = False
+        self._paused = False
+        self._slow_handle = None
+        self._eof = asyncio.Event()
+        self._write_buf = bytearray()
+        self._resume_reading()
+
+    # --- クライアント ---
+
+    def attach(self) -> ClientChannel:
+        channel = ClientChannel(
+            self.config.client_queue_frames, self.config.client_queue_low_water, self._on_drain,
+            seq=self.seq,
+        )
+        if self._eof.is_set():
+            channel.close('eof')
+        self._channels.append(channel)
+        return channel
+
+    @property
+    def client_count(self) -> int:
+        return len(self._channels)
+
+    def detach(self, channel: ClientChannel) -> None:
+        if channel in self._channels:
+            self._channels.remove(channel)
+            channel.close('detached')
+            self._on_drain()
+
+    # --- 読み取り ---
+
+    def _resume_reading(self) -> None:
+        if not self._reading and not self._eof.is_set() and self.process.master_fd >= 0:
+            self._loop.add_reader(self.process.master_fd, self._on_readable)
+            self._reading = True
+
+    def _pause_reading(self) -> None:
+        if self._reading:
+            self._loop.remove_reader(self.process.master_fd)
+            self._reading = False
+
+    def _on_readable(self) -> None:
+        try:
+            n = os.readv(self.process.master_fd, [self._read_buf])
+        except BlockingIOError:
+            return
+        except OSError as exc:
+            # 子プロセスが PTY を閉じると Linux では EIO になる
+            if exc.errno != errno.EIO:
+                raise
+            n = 0
+        if n == 0:
+            self._on_eof()
+            return
+        self.stats.reads += 1
+        self.stats.bytes_read += n
+        self._pending += self._read_view[:n]
+        if len(self._pending) >= self.config.frame_max_bytes:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(self.config.flush_interval, self._flush)
+
+    def _on_eof(self) -> None:
+        self._pause_reading()
+        self._eof.set()
+        self._flush()
+        if not self._pending:
+            self._close_channels()
+
+    def _close_channels(self) -> None:
+        for channel in self._channels:
+            channel.close('eof')
+
+    # --- フレーム送信 ---
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        if any(channel.full() for channel in self._channels):
+            # 遅いクライアントがいる間は結合バッファに留めて読み取りを止める
+            self._pause()
+            return
+        frame = bytes(self._pending)
+        self._pending.clear()
+        self.stats.frames += 1
+        if self.scrollback is not None:
+            self.scrollback.append(frame)
+        self.seq += len(frame)
+        for channel in self._channels:
+            channel.put(frame)
+        if any(channel.full() for channel in self._channels):
+            self._pause()
+        if self._eof.is_set():
+            self._close_channels()
+
+    def _pause(self) -> None:
+        if not self._paused:
+            self._paused = True
+            self.stats.pauses += 1
+            self._slow_handle = self._loop.call_later(
+                self.config.slow_client_timeout, self._evict_slow_clients
+            )
+        self._pause_reading()
+
+    def _evict_slow_clients(self) -> None:
+        """満杯のまま動かないクライアントを切断する
+
+        全クライアントが遅い場合は切断せず、子プロセス側を待たせ続けます。その場合も
+        後から接続したクライアントが待たされ続けないよう、次の判定を予約し直します。
+        """
+        self._slow_handle = None
+        if all(channel.full() for channel in self._channels):
+            self._slow_handle = self._loop.call_later(
+                self.config.slow_client_timeout, self._evict_slow_clients
+            )
+            return
+        for channel in [c for c in self._channels if c.full()]:
+            self._channels.remove(channel)
+            channel.close('slow')
+            self.stats.evictions += 1
+        self._on_drain()
+
+    def _on_drain(self) -> None:
+        if not self._paused:
+            return
+        if any(len(channel) > channel.low_water for channel in self._channels):
+            return
+        self._paused = False
+        if self._slow_handle is not None:
+            self._slow_handle.cancel()
+            self._slow_handle = None
+        self._flush()
+        if not self._paused:
+            self._resume_reading()
+
+    # --- 入力 ---
+
+    def write(self, data: bytes) -> None:
+        """ブラウザからの入力を PTY へ書き込む（書ききれない分は書き込み可能時に送る）"""
+        if self.process.master_fd < 0:
+            return
+        self._write_buf += data
+        self._on_writable()
+
+    def _on_writable(self) -> None:
+        fd = self.process.master_fd
+        try:
+            while self._write_buf:
+                n = os.write(fd, self._write_buf)
+                del self._write_buf[:n]
+        except BlockingIOError:
+            self._loop.add_writer(fd, self._on_writable)
+            return
+        except OSError:
+            self._write_buf.clear()
+        self._loop.remove_writer(fd)
+
+    def resize(self, cols: int, rows: int) -> None:
+        self.process.resize(cols, rows)
+
+    # --- 終了 ---
+
+    async def wait_closed(self) -> int:
+        """PTY が EOF になり子プロセスが終了するまで待つ"""
+        await self._eof.wait()
+        return await self.process.wait()
+
+    def close(self) -> None:
+        for handle in (self._flush_handle, self._slow_handle):
+            if handle is not None:
+                handle.cancel()
+        self._flush_handle = self._slow_handle = None
+        self._pause_reading()
+        if self._pending and self.scrollback is not None:
+            # 送信しきれなかった出力も履歴には残す
+            self.scrollback.append(self._pending)
+            self.seq += len(self._pending)
+            self._pending.clear()
+        if self.process.master_fd >= 0:
+            self._loop.remove_writer(self.process.master_fd)
+        self._eof.set()
+        self._close_channels()
+        self.process.terminate()
+        self.process.close()
@@ -0,0 +1,57 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass
+class BridgeConfig:
+    """CLI ブリッジ・WebSocket サーバーの設定"""
+
+    # 起動する CLI
+    command: str = 'copilot'
+    args: List[str] = field(default_factory=list)
+    cols: int = 120
+    rows: int = 40
+
+    # PTY 読み取り（再利用バッファのサイズ）
+    read_chunk: int = 64 * 1024
+
+    # 出力の結合: このサイズに達するか、最初の書き込みから flush_interval 秒で送信
+    frame_max_bytes: int = 32 * 1024
+    flush_interval: float = 0.01
+
+    # クライアントごとの送信キュー（フレーム数）。満杯になると PTY の読み取りを止める
+    client_queue_frames: int = 64
+    client_queue_low_water: int = 16
+    # 送信キューが満杯のまま、この秒数を超えたクライアントは切断する（他のクライアントを止めないため）
+    slow_client_timeout: float = 5.0
+
+    # セッション管理
+    # 事前に起動しておく待機プロセス数（起動待ちを隠す）
+    warm_spares: int = 1
+    max_sessions: int = 8
+    max_clients_per_session: int = 8
+    # クライアントが1つも接続していない状態がこの秒数続いたセッションは終了する
+    idle_timeout: float = 15 * 60
+    # 子プロセスごとのリソース制限（None なら制限しない）
+    memory_limit_bytes: Optional[int] = None
+    cpu_time_limit_sec: Optional[int] = None
+
+    # スクロールバック（再接続時の再送・セッション履歴）
+    # セッションごとにメモリ上に保持する直近の出力（バイト）
+    scrollback_bytes: int = 1024 * 1024
+    # あふれた出力を圧縮して保存するディレクトリ（None ならメモリ上の分だけ保持する）
+    history_dir: Optional[str] = None
+    # 圧縮の単位（展開後のバイト数）と、1 セグメントファイルあたりの展開後のバイト数
+    history_block_bytes: int = 64 * 1024
+    history_segment_bytes: int = 8 * 1024 * 1024
+    # セッションごとのディスク上の履歴の上限（展開後のバイト数、古いセグメントから削除）
+    history_max_bytes: int = 256 * 1024 * 1024
+
+    # WebSocket サーバー
+    host: str = '127.0.0.1'
+    port: int = 8765
+    # 接続を許可するブラウザの Origin（既定はこのアプリの UI = Flask 開発サーバー）。
+    # 他のサイトのページから CLI を操作されないよう、ここにない Origin は拒否する
+    allowed_origins: List[str] = field(
+        default_factory=lambda: ['http://127.0.0.1:5000', 'http://localhost:5000']
+    )
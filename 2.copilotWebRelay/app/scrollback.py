@@ -0,0 +1,317 @@
+"""セッションのスクロールバック（上限付きリングバッファ + 圧縮セグメントファイル）
+
+CLI の出力はバイト列のまま扱い、セッション開始からの通し番号（seq = 何バイト目か）で
+位置を表します。再接続したクライアントは最後に受け取った seq を渡すだけで、
+その続きから再送を受けられます。
+
+- 直近の出力は固定長の bytearray をリングバッファとして保持する（メモリは
+  capacity で頭打ち）。読み出しは memoryview のスライスなのでコピーしない
+- リングからあふれた出力は block_bytes 単位で zlib 圧縮し、セグメントファイルに
+  追記する（SegmentStore）。読み出しはファイルを mmap し、必要なブロックだけを展開する
+- セグメントファイルは各ブロックの先頭に (展開後サイズ, 圧縮サイズ) を持つだけの
+  単純な形式で、サーバー再起動後もディレクトリを開けば履歴を復元できる
+"""
+import bisect
+import mmap
+import os
+import re
+import struct
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+# 端末出力は圧縮が効きやすいので、速度優先の圧縮レベルで十分
+COMPRESS_LEVEL = 1
+
+_BLOCK_HEADER = struct.Struct('<II')  # 展開後サイズ, 圧縮サイズ
+_SEGMENT_NAME = re.compile(r'^([0-9a-f]{16})\.seg$')
+
+
+def iter_chunks(source, seq: int, end: Optional[int] = None,
+                chunk: int = 64 * 1024) -> Iterator[Tuple[int, memoryview]]:
+    """source（Scrollback / SegmentStore）の [seq, end) を (先頭の seq, 連続領域) ごとに返す
+
+    保持範囲より古い seq は、残っている最古の位置に切り上げます。返す memoryview は
+    次の要素を取り出すまでの間だけ有効です（その間に新しい出力で上書きされうるため）。
+    取り出すたびに位置を引き直すので、途中でリングからディスクへ移った範囲も正しく読めます。
+    """
+    seq = max(seq, source.start_seq)
+    while True:
+        stop = source.end_seq if end is None else min(end, source.end_seq)
+        if seq >= stop:
+            return
+        seq = max(seq, source.start_seq)
+        view = source.read(seq, min(chunk, stop - seq))
+        if not view:
+            return
+        yield seq, view
+        seq += len(view)
+
+
+class _Segment:
+    """1 つのセグメントファイルと、そのブロック索引"""
+
+    def __init__(self, path: str, start_seq: int):
+        self.path = path
+        self.start_seq = start_seq
+        self.end_seq = start_seq
+        self.size = 0  # ファイル上の有効なバイト数
+        self.block_starts: List[int] = []  # 各ブロックの先頭 seq
+        self.blocks: List[Tuple[int, int, int]] = []  # (データ位置, 圧縮サイズ, 展開後サイズ)
+        self._map: Optional[mmap.mmap] = None
+
+    @classmethod
+    def load(cls, path: str, start_seq: int) -> '_Segment':
+        """既存ファイルのブロックヘッダを走査して索引を作る（途中で切れたブロックは捨てる）"""
+        segment = cls(path, start_seq)
+        file_size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            while segment.size + _BLOCK_HEADER.size <= file_size:
+                f.seek(segment.size)
+                raw_len, comp_len = _BLOCK_HEADER.unpack(f.read(_BLOCK_HEADER.size))
+                if segment.size + _BLOCK_HEADER.size + comp_len > file_size:
+                    break
+                segment._add_block(raw_len, comp_len)
+        return segment
+
+    def _add_block(self, raw_len: int, comp_len: int) -> None:
+        self.block_starts.append(self.end_seq)
+        self.blocks.append((self.size + _BLOCK_HEADER.size, comp_len, raw_len))
+        self.end_seq += raw_len
+        self.size += _BLOCK_HEADER.size + comp_len
+
+    def decompress(self, index: int) -> bytes:
+        offset, comp_len, _ = self.blocks[index]
+        if self._map is None or len(self._map) < offset + comp_len:
+            # 追記中のセグメントは伸びた分だけ mmap し直す
+            self.unmap()
+            with open(self.path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), self.size, access=mmap.ACCESS_READ)
+        with memoryview(self._map) as view:
+            return zlib.decompress(view[offset:offset + comp_len])
+
+    def unmap(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+class SegmentStore:
+    """圧縮ブロックを追記していくセグメントファイル群
+
+    ディレクトリ内の既存セグメントは読み込み時に索引を作り直すので、
+    同じディレクトリを開き直せば保存済みの履歴をそのまま読めます。
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 8 * 1024 * 1024,
+                 max_bytes: Optional[int] = None):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self._segments: List[_Segment] = []
+        self._starts: List[int] = []
+        self._file = None
+        self._cache: Optional[Tuple[_Segment, int, bytes]] = None
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        for name in sorted(os.listdir(self.directory)):
+            match = _SEGMENT_NAME.match(name)
+            if match is None:
+                continue
+            segment = _Segment.load(os.path.join(self.directory, name), int(match.group(1), 16))
+            if self._segments and segment.start_seq != self._segments[-1].end_seq:
+                # 連続していない（途中が欠けた）場合は新しい側だけを残す
+                self._segments.clear()
+            self._segments.append(segment)
+        self._starts = [segment.start_seq for segment in self._segments]
+
+    @property
+    def start_seq(self) -> int:
+        return self._segments[0].start_seq if self._segments else 0
+
+    @property
+    def end_seq(self) -> int:
+        return self._segments[-1].end_seq if self._segments else 0
+
+    def disk_usage(self) -> int:
+        return sum(segment.size for segment in self._segments)
+
+    # --- 書き込み ---
+
+    def append(self, *views) -> None:
+        """views を連結したものを 1 ブロックとして圧縮・追記する"""
+        compressor = zlib.compressobj(COMPRESS_LEVEL)
+        data = b''.join(compressor.compress(view) for view in views) + compressor.flush()
+        raw_len = sum(len(view) for view in views)
+        if not raw_len:
+            return
+        segment = self._writable_segment()
+        self._file.write(_BLOCK_HEADER.pack(raw_len, len(data)) + data)
+        segment._add_block(raw_len, len(data))
+        self._trim()
+
+    def _writable_segment(self) -> _Segment:
+        if self._file is not None and self._segments[-1].end_seq - self._segments[-1].start_seq < self.segment_bytes:
+            return self._segments[-1]
+        self._close_file()
+        start = self.end_seq
+        segment = _Segment(os.path.join(self.directory, f'{start:016x}.seg'), start)
+        # 追記のたびに OS へ渡す（mmap での読み出しから見えるように）
+        self._file = open(segment.path, 'ab', buffering=0)
+        self._segments.append(segment)
+        self._starts.append(start)
+        return segment
+
+    def _trim(self) -> None:
+        """max_bytes を超えた分を古いセグメントから削除する（書き込み中のものは残す）"""
+        if self.max_bytes is None:
+            return
+        while len(self._segments) > 1 and self.end_seq - self._segments[1].start_seq >= self.max_bytes:
+            segment = self._segments.pop(0)
+            self._starts.pop(0)
+            if self._cache is not None and self._cache[0] is segment:
+                self._cache = None
+            segment.unmap()
+            os.unlink(segment.path)
+
+    # --- 読み出し ---
+
+    def read(self, seq: int, limit: int) -> memoryview:
+        """seq から始まる最大 limit バイト（1 ブロック内の連続領域）"""
+        if not self.start_seq <= seq < self.end_seq:
+            return memoryview(b'')
+        segment = self._segments[bisect.bisect_right(self._starts, seq) - 1]
+        index = bisect.bisect_right(segment.block_starts, seq) - 1
+        if self._cache is not None and self._cache[0] is segment and self._cache[1] == index:
+            data = self._cache[2]
+        else:
+            data = segment.decompress(index)
+            self._cache = (segment, index, data)
+        offset = seq - segment.block_starts[index]
+        return memoryview(data)[offset:offset + limit]
+
+    def iter_from(self, seq: int, end: Optional[int] = None) -> Iterator[Tuple[int, memoryview]]:
+        return iter_chunks(self, seq, end)
+
+    # --- 終了 ---
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self) -> None:
+        self._close_file()
+        self._cache = None
+        for segment in self._segments:
+            segment.unmap()
+
+
+class Scrollback:
+    """メモリ上限付きのスクロールバック
+
+    直近 capacity バイトをリングバッファに持ち、それより古い出力は store があれば
+    block_bytes 単位でディスクへ移し、なければ捨てます。
+    """
+
+    def __init__(self, capacity: int, store: Optional[SegmentStore] = None,
+                 block_bytes: int = 64 * 1024):
+        if not 0 < block_bytes <= capacity:
+            raise ValueError('block_bytes must be between 1 and capacity')
+        self.capacity = capacity
+        self.store = store
+        self.block_bytes = block_bytes
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._head = 0  # リング先頭（最古のバイト）の物理位置
+        self._size = 0
+        # 保存済みの履歴があればその続きから番号を振る
+        self._start = store.end_seq if store is not None else 0
+        self.closed = False
+
+    @property
+    def ring_start(self) -> int:
+        return self._start
+
+    @property
+    def start_seq(self) -> int:
+        """読み出せる最古の seq"""
+        if self.store is not None and self.store.end_seq > self.store.start_seq:
+            return self.store.start_seq
+        return self._start
+
+    @property
+    def end_seq(self) -> int:
+        return self._start + self._size
+
+    def _views(self, offset: int, length: int) -> List[memoryview]:
+        """リング先頭から offset バイト目以降 length バイトの領域（折り返しで最大 2 つ）"""
+        pos = (self._head + offset) % self.capacity
+        first = min(length, self.capacity - pos)
+        views = [self._view[pos:pos + first]]
+        if first < length:
+            views.append(self._view[:length - first])
+        return views
+
+    def _evict(self, length: int) -> None:
+        """古い側から length バイトをリングから取り除く（store があればディスクへ）"""
+        if self.store is not None:
+            done = 0
+            while done < length:
+                n = min(self.block_bytes, length - done)
+                self.store.append(*self._views(done, n))
+                done += n
+        self._head = (self._head + length) % self.capacity
+        self._size -= length
+        self._start += length
+
+    def append(self, data) -> None:
+        if self.closed:
+            raise ValueError('scrollback is closed')
+        data = memoryview(data).cast('B')
+        n = len(data)
+        if n >= self.capacity:
+            # リングに収まらない部分はリングを経由せずに退避する
+            self._evict(self._size)
+            overflow = n - self.capacity
+            if self.store is not None:
+                for i in range(0, overflow, self.block_bytes):
+                    self.store.append(data[i:min(i + self.block_bytes, overflow)])
+            self._start += overflow
+            data = data[overflow:]
+            n = self.capacity
+            self._head = 0
+        need = self._size + n - self.capacity
+        if need > 0:
+            # ブロック単位でまとめて退避する（小さなブロックを大量に作らない）
+            blocks = -(-need // self.block_bytes)
+            self._evict(min(self._size, blocks * self.block_bytes))
+        tail = (self._head + self._size) % self.capacity
+        first = min(n, self.capacity - tail)
+        self._view[tail:tail + first] = data[:first]
+        if first < n:
+            self._view[:n - first] = data[first:]
+        self._size += n
+
+    def read(self, seq: int, limit: int) -> memoryview:
+        """seq から始まる最大 limit バイトの連続領域（リング上ならコピーなし）"""
+        if seq >= self._start:
+            if seq >= self.end_seq:
+                return memoryview(b'')
+            return self._views(seq - self._start, min(limit, self.end_seq - seq))[0]
+        if self.store is not None:
+            return self.store.read(seq, limit)
+        return memoryview(b'')
+
+    def iter_from(self, seq: int, end: Optional[int] = None) -> Iterator[Tuple[int, memoryview]]:
+        return iter_chunks(self, seq, end)
+
+    def close(self) -> None:
+        """リングの残りをディスクへ書き出して閉じる（store がなければ破棄）"""
+        if self.closed:
+            return
+        if self.store is not None:
+            self._evict(self._size)
+            self.store.close()
+        self.closed = True
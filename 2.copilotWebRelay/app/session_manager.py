@@ -0,0 +1,252 @@
+"""複数セッションの管理（プロセスプール + ウォームスペア）
+
+- 起動済みの待機プロセス（ウォームスペア）を warm_spares 個保持し、セッション開始時は
+  そこから払い出すことで CLI の起動待ちを隠す。払い出したら裏で補充する
+- 待機プロセスの出力（起動バナーなど）はカーネルの PTY バッファに残り、払い出し後に
+  ブリッジが読み始めるので失われない
+- 1 つのセッションに複数のブラウザタブが接続でき、出力は全クライアントへ配信される
+- クライアントが 1 つも接続していない状態が idle_timeout 秒続いたセッションは終了する
+- 子プロセスには RLIMIT_AS / RLIMIT_CPU でリソース制限をかけられる
+- 各セッションの出力は Scrollback に残す。history_dir を指定すると、あふれた出力と
+  終了時のリングの残りを `history_dir/<session_id>/` に保存し、終了後・再起動後も
+  history() で読み出せる
+"""
+import asyncio
+import logging
+import os
+import re
+import resource
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from .cli_bridge import ClientChannel, PtyBridge, PtyProcess
+from .config import BridgeConfig
+from .scrollback import Scrollback, SegmentStore
+
+logger = logging.getLogger(__name__)
+
+_SESSION_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class SessionLimitError(Exception):
+    """セッション数・クライアント数の上限に達した"""
+
+
+class Session:
+    """1 つの CLI プロセスと、そこに接続しているクライアント群"""
+
+    def __init__(self, session_id: str, bridge: PtyBridge):
+        self.id = session_id
+        self.bridge = bridge
+        self.created_at = time.monotonic()
+        self.last_activity = self.created_at
+        self.returncode: Optional[int] = None
+
+    @property
+    def client_count(self) -> int:
+        return self.bridge.client_count
+
+    @property
+    def scrollback(self) -> Scrollback:
+        return self.bridge.scrollback
+
+    @property
+    def exited(self) -> bool:
+        return self.returncode is not None
+
+    def touch(self) -> None:
+        self.last_activity = time.monotonic()
+
+    def attach(self) -> ClientChannel:
+        self.touch()
+        return self.bridge.attach()
+
+    def detach(self, channel: ClientChannel) -> None:
+        self.touch()
+        self.bridge.detach(channel)
+
+    def write(self, data: bytes) -> None:
+        self.touch()
+        self.bridge.write(data)
+
+    def resize(self, cols: int, rows: int) -> None:
+        self.bridge.resize(cols, rows)
+
+
+class SessionManager:
+    """CLI の子プロセスを監督し、セッションの払い出し・回収を行う"""
+
+    def __init__(self, config: BridgeConfig):
+        self.config = config
+        self.sessions: Dict[str, Session] = {}
+        self._spares: List[PtyProcess] = []
+        self._spawning = 0
+        # 起動中（open() の await 中）のセッション数。上限判定で枠を予約する
+        self._opening = 0
+        self._tasks = set()
+        self._reaper: Optional[asyncio.Task] = None
+        self._closing = False
+
+    # --- 起動・終了 ---
+
+    async def start(self) -> None:
+        """待機プロセスを用意し、アイドルセッションの回収を始める"""
+        await asyncio.gather(*(self._spawn_spare() for _ in range(self.config.warm_spares)))
+        self._reaper = asyncio.create_task(self._reap_idle())
+
+    async def shutdown(self) -> None:
+        self._closing = True
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*(self.close(sid) for sid in list(self.sessions)))
+        spares, self._spares = self._spares, []
+        for process in spares:
+            await self._terminate(process)
+
+    def _background(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # --- 子プロセス ---
+
+    def _limit_resources(self) -> None:
+        # fork 後・exec 前の子プロセス内で実行される
+        if self.config.memory_limit_bytes is not None:
+            limit = self.config.memory_limit_bytes
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        if self.config.cpu_time_limit_sec is not None:
+            limit = self.config.cpu_time_limit_sec
+            resource.setrlimit(resource.RLIMIT_CPU, (limit, limit))
+
+    async def _spawn(self, cols: Optional[int] = None, rows: Optional[int] = None) -> PtyProcess:
+        return await PtyProcess.spawn(
+            [self.config.command, *self.config.args],
+            cols=cols or self.config.cols,
+            rows=rows or self.config.rows,
+            preexec_fn=self._limit_resources,
+        )
+
+    async def _spawn_spare(self) -> None:
+        self._spawning += 1
+        try:
+            process = await self._spawn()
+        except OSError as exc:
+            logger.warning('failed to spawn warm spare: %s', exc)
+            return
+        finally:
+            self._spawning -= 1
+        self._spares.append(process)
+
+    def _refill(self) -> None:
+        if self._closing:
+            return
+        missing = self.config.warm_spares - len(self._spares) - self._spawning
+        capacity = (self.config.max_sessions - len(self.sessions) - self._opening
+                    - len(self._spares) - self._spawning)
+        for _ in range(max(0, min(missing, capacity))):
+            self._background(self._spawn_spare())
+
+    def _take_spare(self) -> Optional[PtyProcess]:
+        while self._spares:
+            process = self._spares.pop(0)
+            if process.proc.returncode is None:
+                return process
+            process.close()
+        return None
+
+    @staticmethod
+    async def _terminate(process: PtyProcess, timeout: float = 5.0) -> None:
+        process.terminate()
+        try:
+            await asyncio.wait_for(process.wait(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+        process.close()
+
+    # --- セッション ---
+
+    async def open(self, cols: Optional[int] = None, rows: Optional[int] = None) -> Session:
+        """新しいセッションを開く（待機プロセスがあれば即座に払い出す）"""
+        # 同時に届いた start が上限をすり抜けないよう、await の前に枠を予約する
+        if len(self.sessions) + self._opening >= self.config.max_sessions:
+            raise SessionLimitError('too many sessions')
+        self._opening += 1
+        try:
+            process = self._take_spare()
+            if process is None:
+                process = await self._spawn(cols, rows)
+            elif cols and rows:
+                process.resize(cols, rows)
+            session_id = uuid.uuid4().hex
+            session = Session(session_id, PtyBridge(process, self.config, self._make_scrollback(session_id)))
+            self.sessions[session.id] = session
+        finally:
+            self._opening -= 1
+        self._background(self._watch(session))
+        self._refill()
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        return self.sessions.get(session_id)
+
+    def _history_path(self, session_id: str) -> Optional[str]:
+        if self.config.history_dir is None or not _SESSION_ID.match(session_id):
+            return None
+        return os.path.join(self.config.history_dir, session_id)
+
+    def _make_scrollback(self, session_id: str) -> Scrollback:
+        path = self._history_path(session_id)
+        store = None
+        if path is not None:
+            store = SegmentStore(path, self.config.history_segment_bytes, self.config.history_max_bytes)
+        block_bytes = min(self.config.history_block_bytes, self.config.scrollback_bytes)
+        return Scrollback(self.config.scrollback_bytes, store, block_bytes)
+
+    def history(self, session_id: str) -> Optional[SegmentStore]:
+        """終了したセッションの保存済み出力（なければ None、使い終わったら close する）"""
+        if session_id in self.sessions:
+            return None
+        path = self._history_path(session_id)
+        if path is None or not os.path.isdir(path):
+            return None
+        return SegmentStore(path)
+
+    def attach(self, session: Session) -> ClientChannel:
+        if session.client_count >= self.config.max_clients_per_session:
+            raise SessionLimitError('too many clients for this session')
+        return session.attach()
+
+    async def _watch(self, session: Session) -> None:
+        session.returncode = await session.bridge.wait_closed()
+        session.bridge.close()
+        session.scrollback.close()
+        self.sessions.pop(session.id, None)
+        self._refill()
+
+    async def close(self, session_id: str) -> None:
+        """セッションを終了する（接続中の全クライアントに EOF が届く）"""
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return
+        process = session.bridge.process
+        session.bridge.close()
+        session.scrollback.close()
+        await self._terminate(process)
+        session.returncode = process.proc.returncode
+        self._refill()
+
+    async def _reap_idle(self) -> None:
+        interval = max(0.05, min(self.config.idle_timeout / 4, 30.0))
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for session in list(self.sessions.values()):
+                if session.client_count == 0 and now - session.last_activity >= self.config.idle_timeout:
+                    logger.info('closing idle session %s', session.id)
+                    await self.close(session.id)
@@ -0,0 +1,249 @@
+"""WebSocket ハンドラ（メッセージルーティング + ステータス応答）
+
+planning.md の WebSocket プロトコルに従い、ブラウザとの接続を SessionManager の
+セッションに中継します。プロトコルの拡張:
+
+- `{"type": "session", "action": "start"}` の status 応答に `session_id` を含める
+- `{"type": "session", "action": "attach", "session_id": ...}` で既存セッションに
+  接続する（複数タブでの共有）
+- `{"type": "session", "action": "detach"}` でセッションを残したまま切り離す
+- output メッセージに `seq`（そのメッセージまでに送った出力のバイト数）を含める。
+  attach に `"since": seq` を付けると、その続きからスクロールバックを再送してから
+  ライブ出力に切り替える。省略時はメモリ上のリングの先頭（直近 scrollback_bytes）からで、
+  ディスク上の古い履歴は since で明示的に指定した場合だけ読む。終了済みのセッションに
+  attach した場合は保存済みの履歴（省略時は末尾 scrollback_bytes）を再送し、stopped を返す
+"""
+import asyncio
+import codecs
+import json
+import logging
+from typing import Iterable, Optional
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+from .cli_bridge import ClientChannel
+from .config import BridgeConfig
+from .session_manager import Session, SessionLimitError, SessionManager
+
+logger = logging.getLogger(__name__)
+
+# 端末サイズの上限（TIOCSWINSZ は 16 bit）
+MAX_TERMINAL_SIZE = 1000
+
+
+def _dumps(message: dict) -> str:
+    return json.dumps(message, ensure_ascii=False, separators=(',', ':'))
+
+
+def _int_field(data: dict, key: str, minimum: int, maximum: int, default=None):
+    """メッセージの整数フィールド（不正な値は ValueError）"""
+    value = data.get(key)
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f'{key} must be an integer')
+    value = int(value)
+    if not minimum <= value <= maximum:
+        raise ValueError(f'{key} must be between {minimum} and {maximum}')
+    return value
+
+
+def _decoder():
+    # フレーム境界でマルチバイト文字が分断されても崩れないよう逐次デコード
+    return codecs.getincrementaldecoder('utf-8')('replace')
+
+
+class RelayConnection:
+    """1 つの WebSocket 接続とセッションの中継"""
+
+    def __init__(self, websocket, manager: SessionManager):
+        self.websocket = websocket
+        self.manager = manager
+        self.session: Optional[Session] = None
+        self._channel: Optional[ClientChannel] = None
+        self._pump: Optional[asyncio.Task] = None
+
+    async def run(self) -> None:
+        try:
+            async for message in self.websocket:
+                try:
+                    data = json.loads(message)
+                except ValueError:
+                    await self.send_status('error', 'Invalid message: malformed JSON')
+                    continue
+                if not isinstance(data, dict):
+                    await self.send_status('error', 'Invalid message: expected a JSON object')
+                    continue
+                try:
+                    await self.handle(data)
+                except ValueError as exc:
+                    # 不正なメッセージ 1 つで接続（とセッションへの中継）を落とさない
+                    await self.send_status('error', f'Invalid message: {exc}')
+        except ConnectionClosed:
+            pass
+        finally:
+            await self.detach()
+
+    async def send_status(self, state: str, payload: str, **extra) -> None:
+        try:
+            await self.websocket.send(_dumps({'type': 'status', 'payload': payload, 'state': state, **extra}))
+        except ConnectionClosed:
+            pass
+
+    async def handle(self, data: dict) -> None:
+        mtype = data.get('type')
+        if mtype == 'session':
+            action = data.get('action')
+            if action == 'start':
+                await self.start_session(_int_field(data, 'cols', 1, MAX_TERMINAL_SIZE),
+                                         _int_field(data, 'rows', 1, MAX_TERMINAL_SIZE))
+            elif action == 'attach':
+                await self.attach_session(str(data.get('session_id', '')),
+                                          _int_field(data, 'since', 0, 2 ** 63 - 1))
+            elif action == 'detach':
+                await self.detach()
+                await self.send_status('stopped', 'Session detached')
+            elif action == 'stop':
+                await self.stop_session()
+        elif mtype == 'input' and self.session is not None:
+            self.session.write(str(data.get('payload', '')).encode('utf-8'))
+        elif mtype == 'resize' and self.session is not None:
+            cols = _int_field(data, 'cols', 1, MAX_TERMINAL_SIZE)
+            rows = _int_field(data, 'rows', 1, MAX_TERMINAL_SIZE)
+            if cols is None or rows is None:
+                raise ValueError('cols and rows are required')
+            self.session.resize(cols, rows)
+
+    async def start_session(self, cols: Optional[int], rows: Optional[int]) -> None:
+        if self.session is not None:
+            await self.send_status('running', 'Session already running', session_id=self.session.id)
+            return
+        try:
+            session = await self.manager.open(cols, rows)
+        except (OSError, SessionLimitError) as exc:
+            logger.warning('failed to start CLI: %s', exc)
+            await self.send_status('error', f'Failed to start CLI: {exc}')
+            return
+        await self._attach(session, 'Session started')
+
+    async def attach_session(self, session_id: str, since: Optional[int] = None) -> None:
+        session = self.manager.get(session_id)
+        if session is None:
+            await self.replay_history(session_id, since)
+            return
+        if session is self.session:
+            await self.send_status('running', 'Session already attached', session_id=session.id)
+            return
+        await self.detach()
+        if since is None:
+            # 2つ目のタブや seq を失った再接続には直近の出力だけを送る
+            since = session.scrollback.ring_start
+        await self._attach(session, 'Session attached', since)
+
+    async def replay_history(self, session_id: str, since: Optional[int]) -> None:
+        """終了済みセッションの保存済み出力を再送する"""
+        store = self.manager.history(session_id)
+        if store is None:
+            await self.send_status('error', 'Session not found')
+            return
+        try:
+            if since is None:
+                since = max(store.start_seq, store.end_seq - self.manager.config.scrollback_bytes)
+            await self._send_output(store.iter_from(since), since, _decoder())
+        except ConnectionClosed:
+            return
+        finally:
+            store.close()
+        await self.send_status('stopped', 'Session history restored', session_id=session_id)
+
+    async def _attach(self, session: Session, message: str, since: Optional[int] = None) -> None:
+        try:
+            channel = self.manager.attach(session)
+        except SessionLimitError as exc:
+            await self.send_status('error', str(exc))
+            return
+        self.session = session
+        self._channel = channel
+        await self.send_status('running', message, session_id=session.id)
+        # attach と同時点（channel.seq）までをスクロールバックから、以降はライブで送る
+        replay = session.scrollback.iter_from(since, channel.seq) if since is not None else None
+        self._pump = asyncio.create_task(self._pump_output(session, channel, replay, since or 0))
+
+    async def _send_output(self, chunks: Iterable, seq: int, decoder) -> int:
+        for start, chunk in chunks:
+            # chunk はリングバッファへの view なので、次の await より前にデコードする
+            text = decoder.decode(chunk)
+            seq = start + len(chunk)
+            await self._send_frame(text, seq, decoder)
+        return seq
+
+    async def _send_frame(self, text: str, seq: int, decoder) -> None:
+        # デコーダに残っている（文字の途中の）バイトはまだ送っていない扱いにする
+        pending = len(decoder.getstate()[0])
+        await self.websocket.send(_dumps({'type': 'output', 'payload': text, 'seq': seq - pending}))
+
+    async def _pump_output(self, session: Session, channel: ClientChannel,
+                           replay: Optional[Iterable] = None, since: int = 0) -> None:
+        """送信キューから WebSocket へ（send の待ちがそのままバックプレッシャーになる）"""
+        decoder = _decoder()
+        try:
+            if replay is not None:
+                await self._send_output(replay, since, decoder)
+            while True:
+                frame = await channel.get()
+                if frame is None:
+                    break
+                await self._send_frame(decoder.decode(frame), channel.seq, decoder)
+        except ConnectionClosed:
+            return
+        if channel is not self._channel:
+            return
+        self.session = None
+        self._channel = None
+        if channel.reason == 'slow':
+            await self.send_status('error', 'Disconnected: client too slow', session_id=session.id)
+        elif channel.reason == 'eof':
+            await self.send_status('stopped', 'Session exited', session_id=session.id)
+
+    async def detach(self) -> None:
+        """セッションから切り離す（セッション自体は残る）"""
+        session, channel, pump = self.session, self._channel, self._pump
+        self.session = self._channel = self._pump = None
+        if session is not None and channel is not None:
+            session.detach(channel)
+        if pump is not None:
+            pump.cancel()
+
+    async def stop_session(self) -> None:
+        """セッションを終了する（同じセッションの他のクライアントにも stopped が届く）"""
+        if self.session is None:
+            return
+        session = self.session
+        await self.detach()
+        await self.manager.close(session.id)
+        await self.send_status('stopped', 'Session stopped', session_id=session.id)
+
+
+def relay_server(manager: SessionManager, host: str, port: int):
+    """WebSocket サーバー（async with で使う）
+
+    Origin が allowed_origins にないブラウザからの接続はハンドシェイクで拒否（403）します。
+    Origin ヘッダを送らないクライアント（ブラウザ以外）は許可します。
+    """
+    async def handler(websocket):
+        await RelayConnection(websocket, manager).run()
+
+    return serve(handler, host, port, origins=[*manager.config.allowed_origins, None])
+
+
+async def serve_relay(config: BridgeConfig) -> None:
+    """WebSocket サーバーを起動して待ち続ける"""
+    manager = SessionManager(config)
+    await manager.start()
+    try:
+        async with relay_server(manager, config.host, config.port) as server:
+            logger.info('relay listening on ws://%s:%d', config.host, config.port)
+            await server.serve_forever()
+    finally:
+        await manager.shutdown()
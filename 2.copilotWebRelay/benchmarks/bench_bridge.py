@@ -0,0 +1,78 @@
+"""CLI ブリッジのベンチマーク
+
+使い方:
+    python benchmarks/bench_bridge.py --lines 500000
+    python benchmarks/bench_bridge.py --lines 200000 --client-delay 0.002
+
+tests/fake_cli.py の flood モード（1 行ずつの小さな書き込み）を PTY 上で起動し、
+フレーム数・フレーム/秒・スループットと、送信キューのピーク・メモリ使用量を
+結合設定ごとに計測します。--client-delay で遅いブラウザを模擬します。
+"""
+import argparse
+import asyncio
+import pathlib
+import resource
+import sys
+import time
+import tracemalloc
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.cli_bridge import PtyBridge, PtyProcess
+from app.config import BridgeConfig
+
+FAKE_CLI = str(ROOT / 'tests' / 'fake_cli.py')
+
+
+async def run(config: BridgeConfig, lines: int, width: int, client_delay: float):
+    process = await PtyProcess.spawn([sys.executable, FAKE_CLI, 'flood', '--lines', str(lines), '--width', str(width)])
+    bridge = PtyBridge(process, config)
+    channel = bridge.attach()
+    received = 0
+    peak_frames = 0
+    peak_bytes = 0
+    start = time.perf_counter()
+    while True:
+        peak_frames = max(peak_frames, len(channel))
+        peak_bytes = max(peak_bytes, sum(len(f) for f in channel._frames))
+        frame = await channel.get()
+        if frame is None:
+            break
+        received += len(frame)
+        if client_delay:
+            await asyncio.sleep(client_delay)
+    elapsed = time.perf_counter() - start
+    await bridge.wait_closed()
+    bridge.close()
+    return bridge.stats, received, elapsed, peak_frames, peak_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, default=500000)
+    parser.add_argument('--width', type=int, default=40)
+    parser.add_argument('--client-delay', type=float, default=0.0)
+    args = parser.parse_args()
+
+    settings = [
+        ('no coalescing', dict(frame_max_bytes=1, flush_interval=0)),
+        ('4 KiB / 5 ms', dict(frame_max_bytes=4 * 1024, flush_interval=0.005)),
+        ('default (32 KiB / 10 ms)', dict()),
+    ]
+    print(f'{args.lines} writes x {args.width} B, client delay {args.client_delay * 1e3:.1f} ms/frame')
+    print(f'{"setting":<26}{"reads":>9}{"frames":>9}{"frames/s":>10}{"MiB/s":>8}{"peakQ":>7}{"peakQ KiB":>10}{"py peak KiB":>12}')
+    for label, overrides in settings:
+        tracemalloc.start()
+        stats, received, elapsed, peak_frames, peak_bytes = asyncio.run(
+            run(BridgeConfig(**overrides), args.lines, args.width, args.client_delay))
+        _, py_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f'{label:<26}{stats.reads:>9}{stats.frames:>9}{stats.frames / elapsed:>10.0f}'
+              f'{received / elapsed / 2 ** 20:>8.1f}{peak_frames:>7}{peak_bytes / 1024:>10.0f}{py_peak / 1024:>12.0f}')
+    print(f'max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
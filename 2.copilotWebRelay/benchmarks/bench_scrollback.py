@@ -0,0 +1,118 @@
+"""スクロールバックのベンチマーク
+
+使い方:
+    python benchmarks/bench_scrollback.py --mib 64
+    python benchmarks/bench_scrollback.py --mib 64 --capacity-kib 256
+
+端末出力を模したデータを 4 KiB ずつ書き込み、Python の str に貯め続ける素朴な
+実装と、Scrollback（メモリのみ / ディスク退避あり）を比較します。書き込みの
+スループット、Python 側のメモリのピーク、ディスク使用量（圧縮後）と、
+再接続時の再送にかかる時間（直近 64 KiB / 先頭からの全量）を計測します。
+"""
+import argparse
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.scrollback import Scrollback, SegmentStore
+
+WRITE = 4096
+
+
+def make_output(total: int) -> bytes:
+    line_no = 0
+    lines = []
+    size = 0
+    while size < total:
+        line = f'\x1b[32m{line_no:08d}\x1b[0m build step {line_no % 97} ok ({line_no * 7 % 1000} ms)\r\n'.encode()
+        lines.append(line)
+        size += len(line)
+        line_no += 1
+    return b''.join(lines)[:total]
+
+
+class NaiveHistory:
+    """比較用: デコードした文字列を貯め続ける"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def append(self, data):
+        self.chunks.append(data.decode('utf-8', 'replace'))
+
+    def replay(self, seq):
+        return ''.join(self.chunks)[seq:]
+
+
+def fill(history, data):
+    for i in range(0, len(data), WRITE):
+        history.append(data[i:i + WRITE])
+    return history
+
+
+def bench(factory, data):
+    # スループットは tracemalloc なしで、メモリは別の実行で計測する
+    history = factory()
+    start = time.perf_counter()
+    fill(history, data)
+    write_s = time.perf_counter() - start
+    tail_ms, full_ms = (replay_time(history, seq) * 1e3 for seq in (len(data) - 64 * 1024, 0))
+    close(history)
+
+    tracemalloc.start()
+    history = fill(factory(), data)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(data) / write_s / 2 ** 20, current / 2 ** 20, peak / 2 ** 20, tail_ms, full_ms, history
+
+
+def close(history):
+    if getattr(history, 'store', None) is not None:
+        history.close()
+        for path in pathlib.Path(history.store.directory).iterdir():
+            path.unlink()
+
+
+def replay_time(history, seq):
+    start = time.perf_counter()
+    if isinstance(history, NaiveHistory):
+        history.replay(seq)
+    else:
+        for _, view in history.iter_from(seq):
+            bytes(view)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mib', type=int, default=64)
+    parser.add_argument('--capacity-kib', type=int, default=1024)
+    args = parser.parse_args()
+
+    data = make_output(args.mib * 2 ** 20)
+    capacity = args.capacity_kib * 1024
+    print(f'{args.mib} MiB of output in {WRITE} B writes, scrollback capacity {args.capacity_kib} KiB')
+    print(f'{"history":<22}{"write MiB/s":>12}{"mem MiB":>9}{"peak MiB":>10}{"disk MiB":>10}'
+          f'{"tail64K ms":>12}{"full ms":>10}')
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = [
+            ('python str list', NaiveHistory),
+            ('ring (memory only)', lambda: Scrollback(capacity)),
+            ('ring + segments', lambda: Scrollback(capacity, SegmentStore(tmp))),
+        ]
+        for label, factory in cases:
+            mib_s, mem, peak, tail_ms, full_ms, history = bench(factory, data)
+            store = getattr(history, 'store', None)
+            disk = f'{store.disk_usage() / 2 ** 20:>10.1f}' if store is not None else f'{"-":>10}'
+            print(f'{label:<22}{mib_s:>12.0f}{mem:>9.1f}{peak:>10.1f}{disk}{tail_ms:>12.2f}{full_ms:>10.1f}')
+            close(history)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""セッション開始レイテンシのベンチマーク
+
+使い方:
+    python benchmarks/bench_sessions.py --sessions 10 --startup-delay 0.3
+
+tests/fake_cli.py の echo モード（起動に --startup-delay 秒かかる CLI の代役）を使い、
+セッションを開いてから最初のプロンプト（`ready>`）が届くまでの時間を、
+ウォームスペアなし・ありで計測します。各セッションは閉じてから次を開くので、
+ウォームスペアありの場合は補充が間に合うかどうかも結果に表れます。
+"""
+import argparse
+import asyncio
+import pathlib
+import statistics
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.config import BridgeConfig
+from app.session_manager import SessionManager
+
+FAKE_CLI = str(ROOT / 'tests' / 'fake_cli.py')
+
+
+async def run(config: BridgeConfig, sessions: int, think_time: float):
+    manager = SessionManager(config)
+    await manager.start()
+    latencies = []
+    try:
+        for _ in range(sessions):
+            await asyncio.sleep(think_time)  # 利用者がタブを開く間隔（スペアの補充時間）
+            start = time.perf_counter()
+            session = await manager.open()
+            channel = manager.attach(session)
+            data = b''
+            while b'ready>' not in data:
+                frame = await channel.get()
+                if frame is None:
+                    raise RuntimeError('CLI exited before prompt')
+                data += frame
+            latencies.append(time.perf_counter() - start)
+            await manager.close(session.id)
+    finally:
+        await manager.shutdown()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=10)
+    parser.add_argument('--startup-delay', type=float, default=0.3)
+    parser.add_argument('--think-time', type=float, default=0.5)
+    args = parser.parse_args()
+
+    argv = [sys.executable, FAKE_CLI, 'echo', '--startup-delay', str(args.startup_delay)]
+    print(f'{args.sessions} sessions, CLI startup {args.startup_delay * 1e3:.0f} ms, '
+          f'think time {args.think_time * 1e3:.0f} ms')
+    print(f'{"warm spares":<12}{"p50 ms":>9}{"p90 ms":>9}{"max ms":>9}')
+    for spares in (0, 1, 2):
+        config = BridgeConfig(command=argv[0], args=argv[1:], warm_spares=spares)
+        latencies = sorted(asyncio.run(run(config, args.sessions, args.think_time)))
+        p90 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.9))]
+        print(f'{spares:<12}{statistics.median(latencies) * 1e3:>9.1f}{p90 * 1e3:>9.1f}{latencies[-1] * 1e3:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
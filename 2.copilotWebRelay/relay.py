@@ -0,0 +1,29 @@
+import argparse
+import asyncio
+import logging
+
+from app.config import BridgeConfig
+from app.websocket_handler import serve_relay
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Copilot CLI WebSocket relay')
+    parser.add_argument('--host', default=BridgeConfig.host)
+    parser.add_argument('--port', type=int, default=BridgeConfig.port)
+    parser.add_argument('--command', default=BridgeConfig.command)
+    parser.add_argument('--allowed-origin', action='append', dest='allowed_origins',
+                        help='browser origin allowed to connect (repeatable, default: the Flask UI on port 5000)')
+    parser.add_argument('--history-dir', default=BridgeConfig.history_dir,
+                        help='directory for persisted session output (default: keep scrollback in memory only)')
+    args, cli_args = parser.parse_known_args()
+
+    logging.basicConfig(level=logging.INFO)
+    config = BridgeConfig(command=args.command, args=cli_args, host=args.host, port=args.port,
+                          history_dir=args.history_dir)
+    if args.allowed_origins:
+        config.allowed_origins = args.allowed_origins
+    asyncio.run(serve_relay(config))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+import sys
+import pathlib
+
+import pytest
+
+# テスト実行時にこのパッケージのルートを sys.path に追加する
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+FAKE_CLI = str(pathlib.Path(__file__).resolve().parent / 'fake_cli.py')
+
+
+@pytest.fixture
+def fake_cli_argv():
+    """fake_cli.py を起動する argv を作る"""
+    def _argv(*args):
+        return [sys.executable, FAKE_CLI, *args]
+    return _argv
@@ -0,0 +1,43 @@
+"""テスト・ベンチマーク用の Copilot CLI の代役
+
+    python tests/fake_cli.py flood --lines 100000 --width 40
+        小さな書き込み（1 行ずつ write）を大量に出力して終了する
+    python tests/fake_cli.py echo [--startup-delay 0.5]
+        起動後にプロンプトを出し、入力行をそのまま返す
+"""
+import argparse
+import os
+import sys
+import time
+
+
+def flood(lines: int, width: int) -> None:
+    pad = 'x' * max(0, width - 12)
+    for i in range(lines):
+        os.write(1, f'{i:010d} {pad}\n'.encode())
+
+
+def echo(startup_delay: float) -> None:
+    time.sleep(startup_delay)
+    os.write(1, b'ready> ')
+    for line in sys.stdin:
+        os.write(1, f'echo: {line.rstrip()}\nready> '.encode())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest='mode', required=True)
+    p_flood = sub.add_parser('flood')
+    p_flood.add_argument('--lines', type=int, default=100000)
+    p_flood.add_argument('--width', type=int, default=40)
+    p_echo = sub.add_parser('echo')
+    p_echo.add_argument('--startup-delay', type=float, default=0.0)
+    args = parser.parse_args()
+    if args.mode == 'flood':
+        flood(args.lines, args.width)
+    else:
+        echo(args.startup_delay)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""CLI ブリッジのテスト（fake_cli.py を PTY 上で起動）"""
+import asyncio
+import json
+
+import pytest
+from websockets.asyncio.client import connect
+from websockets.exceptions import InvalidStatus
+
+from app.cli_bridge import PtyBridge, PtyProcess
+from app.config import BridgeConfig
+from app.session_manager import SessionManager
+from app.websocket_handler import relay_server
+
+
+async def _collect(channel, delay=0.0):
+    chunks = []
+    max_queued = 0
+    while True:
+        max_queued = max(max_queued, len(channel))
+        frame = await channel.get()
+        if frame is None:
+            return b''.join(chunks), max_queued
+        chunks.append(frame)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+def _assert_sequential(output, lines):
+    rows = output.replace(b'\r\n', b'\n').split(b'\n')
+    assert rows[-1] == b''
+    assert [int(row.split()[0]) for row in rows[:-1]] == list(range(lines))
+
+
+def test_flood_is_coalesced(fake_cli_argv):
+    """大量の小さな書き込みが順序を保ったまま少数のフレームに結合されることをテスト"""
+    lines = 20000
+
+    async def main():
+        config = BridgeConfig()
+        process = await PtyProcess.spawn(fake_cli_argv('flood', '--lines', str(lines)))
+        bridge = PtyBridge(process, config)
+        output, _ = await _collect(bridge.attach())
+        await bridge.wait_closed()
+        bridge.close()
+        return output, bridge.stats
+
+    output, stats = asyncio.run(main())
+    _assert_sequential(output, lines)
+    assert stats.frames < lines // 10
+    assert stats.bytes_read == len(output)
+
+
+def test_slow_client_backpressure(fake_cli_argv):
+    """遅いクライアントでは送信キューが上限を超えず、PTY の読み取りが止まることをテスト"""
+    lines = 20000
+
+    async def main():
+        config = BridgeConfig(frame_max_bytes=4096, client_queue_frames=4, client_queue_low_water=1)
+        process = await PtyProcess.spawn(fake_cli_argv('flood', '--lines', str(lines)))
+        bridge = PtyBridge(process, config)
+        output, max_queued = await _collect(bridge.attach(), delay=0.001)
+        await bridge.wait_closed()
+        bridge.close()
+        return output, max_queued, bridge.stats
+
+    output, max_queued, stats = asyncio.run(main())
+    _assert_sequential(output, lines)
+    assert max_queued <= 4
+    assert stats.pauses > 0
+
+
+def test_slow_client_is_evicted(fake_cli_argv):
+    """止まったクライアントは切断され、他のクライアントには全出力が届くことをテスト"""
+    lines = 20000
+
+    async def main():
+        config = BridgeConfig(frame_max_bytes=4096, client_queue_frames=4, client_queue_low_water=1,
+                              slow_client_timeout=0.2)
+        process = await PtyProcess.spawn(fake_cli_argv('flood', '--lines', str(lines)))
+        bridge = PtyBridge(process, config)
+        stalled = bridge.attach()
+        output, _ = await _collect(bridge.attach())
+        await bridge.wait_closed()
+        bridge.close()
+        return output, stalled, bridge.stats
+
+    output, stalled, stats = asyncio.run(main())
+    _assert_sequential(output, lines)
+    assert stalled.reason == 'slow'
+    assert len(stalled) <= 4
+    assert stats.evictions == 1
+
+
+def test_late_client_after_all_clients_stalled(fake_cli_argv):
+    """全クライアントが止まった後に接続したクライアントにも出力が届くことをテスト"""
+    lines = 20000
+
+    async def main():
+        config = BridgeConfig(frame_max_bytes=4096, client_queue_frames=4, client_queue_low_water=1,
+                              slow_client_timeout=0.2)
+        process = await PtyProcess.spawn(fake_cli_argv('flood', '--lines', str(lines)))
+        bridge = PtyBridge(process, config)
+        stalled = bridge.attach()
+        await asyncio.sleep(0.5)  # 唯一のクライアントが止まったまま判定時刻を過ぎる
+        late = bridge.attach()
+        output, _ = await asyncio.wait_for(_collect(late), timeout=10)
+        await bridge.wait_closed()
+        bridge.close()
+        return output, stalled
+
+    output, stalled = asyncio.run(main())
+    assert stalled.reason == 'slow'
+    assert output.endswith(f'{lines - 1:010d} '.encode() + b'x' * 28 + b'\r\n')
+
+
+def test_spawn_failure():
+    """存在しないコマンドの起動は OSError になることをテスト"""
+    async def main():
+        await PtyProcess.spawn(['/nonexistent/copilot'])
+
+    with pytest.raises(OSError):
+        asyncio.run(main())
+
+
+def test_websocket_session(fake_cli_argv):
+    """WebSocket 経由でセッション開始・入力・停止ができることをテスト"""
+    argv = fake_cli_argv('echo')
+    config = BridgeConfig(command=argv[0], args=argv[1:], warm_spares=0)
+
+    async def recv_until(ws, predicate):
+        messages = []
+        while True:
+            msg = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+            messages.append(msg)
+            if predicate(msg, messages):
+                return messages
+
+    def output_contains(text):
+        return lambda msg, messages: text in ''.join(
+            m['payload'] for m in messages if m['type'] == 'output')
+
+    async def main():
+        manager = SessionManager(config)
+        await manager.start()
+
+        async with relay_server(manager, '127.0.0.1', 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            async with connect(f'ws://127.0.0.1:{port}') as ws:
+                await ws.send(json.dumps({'type': 'session', 'action': 'start', 'cols': 80, 'rows': 24}))
+                status = json.loads(await ws.recv())
+                assert status['state'] == 'running'
+                assert status['session_id'] in manager.sessions
+                await recv_until(ws, output_contains('ready>'))
+
+                await ws.send(json.dumps({'type': 'resize', 'cols': 100, 'rows': 30}))
+                # 不正なメッセージには error を返し、接続とセッションは維持する
+                for bad in ({'type': 'resize', 'cols': 'wide', 'rows': 30}, {'type': 'resize'},
+                            {'type': 'session', 'action': 'attach', 'session_id': 'x', 'since': 'y'}, [1, 2],
+                            '{not json'):
+                    await ws.send(bad if isinstance(bad, str) else json.dumps(bad))
+                    messages = await recv_until(ws, lambda msg, _: msg['type'] == 'status')
+                    assert messages[-1]['state'] == 'error'
+                await ws.send(json.dumps({'type': 'input', 'payload': 'こんにちは\n'}))
+                await recv_until(ws, output_contains('echo: こんにちは'))
+
+                await ws.send(json.dumps({'type': 'session', 'action': 'stop'}))
+                messages = await recv_until(ws, lambda msg, _: msg['type'] == 'status')
+                assert messages[-1]['state'] == 'stopped'
+        await manager.shutdown()
+
+    asyncio.run(main())
+
+
+def test_websocket_reconnect_replay(fake_cli_argv, tmp_path):
+    """再接続時に since 以降の出力が再送され、終了後も履歴を読めることをテスト"""
+    argv = fake_cli_argv('echo')
+    config = BridgeConfig(command=argv[0], args=argv[1:], warm_spares=0,
+                          scrollback_bytes=4096, history_block_bytes=1024, history_dir=str(tmp_path))
+
+    async def recv_output(ws, text):
+        payload, seq = '', None
+        while text not in payload:
+            msg = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+            if msg['type'] == 'output':
+                payload += msg['payload']
+                seq = msg['seq']
+        return payload, seq
+
+    async def main():
+        manager = SessionManager(config)
+        await manager.start()
+
+        async with relay_server(manager, '127.0.0.1', 0) as server:
+            url = f'ws://127.0.0.1:{server.sockets[0].getsockname()[1]}'
+            async with connect(url) as ws:
+                await ws.send(json.dumps({'type': 'session', 'action': 'start'}))
+                session_id = json.loads(await ws.recv())['session_id']
+                for i in range(100):  # リングからあふれる量を出力させる
+                    await ws.send(json.dumps({'type': 'input', 'payload': f'line {i:03d} ' + 'x' * 40 + '\n'}))
+                _, seq = await recv_output(ws, 'echo: line 099')
+
+            async with connect(url) as ws:
+                await ws.send(json.dumps({'type': 'input', 'payload': 'ignored\n'}))
+                await ws.send(json.dumps({'type': 'session', 'action': 'attach',
+                                          'session_id': session_id, 'since': seq}))
+                assert json.loads(await ws.recv())['state'] == 'running'
+                await ws.send(json.dumps({'type': 'input', 'payload': 'after\n'}))
+                replayed, _ = await recv_output(ws, 'echo: after')
+                assert 'line 099' not in replayed
+
+                # since なしの attach（2つ目のタブ）はメモリ上の直近の出力だけを受け取る
+                async with connect(url) as tab:
+                    await tab.send(json.dumps({'type': 'session', 'action': 'attach', 'session_id': session_id}))
+                    assert json.loads(await tab.recv())['state'] == 'running'
+                    tail, _ = await recv_output(tab, 'echo: after')
+                    assert 'line 000' not in tail
+                    assert len(tail.encode()) <= 4096
+
+                await ws.send(json.dumps({'type': 'session', 'action': 'stop'}))
+                await recv_output(ws, '')
+
+            async with connect(url) as ws:
+                await ws.send(json.dumps({'type': 'session', 'action': 'attach',
+                                          'session_id': session_id, 'since': 0}))
+                history, end = await recv_output(ws, 'echo: after')
+                status = json.loads(await ws.recv())
+        await manager.shutdown()
+        return history, end, status
+
+    history, end, status = asyncio.run(main())
+    assert status['state'] == 'stopped'
+    assert 'ready> ' in history
+    assert 'ignored' not in history  # セッション未接続の入力は捨てられる
+    assert all(f'echo: line {i:03d}' in history for i in range(100))
+    assert end == len(history.encode())
+
+
+def test_websocket_rejects_foreign_origin(fake_cli_argv):
+    """許可されていない Origin のページからは接続できないことをテスト"""
+    argv = fake_cli_argv('echo')
+    config = BridgeConfig(command=argv[0], args=argv[1:], warm_spares=0)
+
+    async def main():
+        manager = SessionManager(config)
+        await manager.start()
+        async with relay_server(manager, '127.0.0.1', 0) as server:
+            url = f'ws://127.0.0.1:{server.sockets[0].getsockname()[1]}'
+            with pytest.raises(InvalidStatus) as excinfo:
+                async with connect(url, origin='https://evil.example'):
+                    pass
+            async with connect(url, origin='http://localhost:5000') as ws:
+                await ws.send(json.dumps({'type': 'session', 'action': 'start'}))
+                status = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+        await manager.shutdown()
+        return excinfo.value.response.status_code, status, manager.sessions
+
+    code, status, sessions = asyncio.run(main())
+    assert code == 403
+    assert status['state'] == 'running'
+    assert not sessions
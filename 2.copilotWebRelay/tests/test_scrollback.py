@@ -0,0 +1,92 @@
+"""スクロールバック（リングバッファ + 圧縮セグメント）のテスト"""
+import os
+
+import pytest
+
+from app.scrollback import Scrollback, SegmentStore
+
+
+def _output(lines, start=0):
+    return b''.join(f'{i:08d} line of terminal output\r\n'.encode() for i in range(start, start + lines))
+
+
+def _read_all(source, seq=0, end=None):
+    chunks = []
+    for start, view in source.iter_from(seq, end):
+        chunks.append((start, bytes(view)))
+    return chunks
+
+
+def test_ring_keeps_latest_bytes_within_capacity():
+    """リングバッファは直近 capacity バイトだけを保持し、任意の位置から読めることをテスト"""
+    ring = Scrollback(1000, block_bytes=100)
+    data = _output(500)
+    for i in range(0, len(data), 37):
+        ring.append(data[i:i + 37])
+
+    assert ring.end_seq == len(data)
+    assert 900 <= ring.end_seq - ring.start_seq <= 1000
+    assert len(ring._buf) == 1000
+    chunks = _read_all(ring)
+    assert chunks[0][0] == ring.start_seq  # 保持範囲より古い位置は切り上げ
+    assert b''.join(c for _, c in chunks) == data[ring.start_seq:]
+    assert b''.join(c for _, c in _read_all(ring, len(data) - 10)) == data[-10:]
+    assert _read_all(ring, len(data)) == []
+
+
+def test_overflow_spills_to_compressed_segments(tmp_path):
+    """あふれた出力が圧縮セグメントに移り、先頭から欠けずに再送できることをテスト"""
+    store = SegmentStore(str(tmp_path), segment_bytes=16 * 1024)
+    ring = Scrollback(4096, store, block_bytes=1024)
+    data = _output(5000)
+    for i in range(0, len(data), 500):
+        ring.append(data[i:i + 500])
+    ring.append(data[:10000])  # capacity を超える 1 回の書き込み
+    data += data[:10000]
+
+    assert ring.start_seq == 0
+    assert ring.end_seq - ring.ring_start <= 4096
+    assert b''.join(c for _, c in _read_all(ring)) == data
+    assert b''.join(c for _, c in _read_all(ring, 123456, 130000)) == data[123456:130000]
+    assert len(os.listdir(tmp_path)) > 1
+    assert store.disk_usage() < store.end_seq / 4
+
+
+def test_history_is_restored_from_disk(tmp_path):
+    """閉じたスクロールバックの内容を、ディレクトリを開き直して読めることをテスト"""
+    data = _output(3000)
+    ring = Scrollback(4096, SegmentStore(str(tmp_path), segment_bytes=8192), block_bytes=1024)
+    ring.append(data)
+    ring.close()
+
+    restored = SegmentStore(str(tmp_path))
+    assert (restored.start_seq, restored.end_seq) == (0, len(data))
+    assert b''.join(c for _, c in _read_all(restored)) == data
+    restored.close()
+
+    # 書き込み途中で切れた最後のブロックは読み飛ばす
+    last = sorted(os.listdir(tmp_path))[-1]
+    with open(tmp_path / last, 'ab') as f:
+        f.write(b'\x10\x00\x00\x00\xff\x00\x00\x00partial')
+    restored = SegmentStore(str(tmp_path))
+    assert restored.end_seq == len(data)
+    restored.close()
+
+
+def test_disk_history_is_capped(tmp_path):
+    """ディスク上の履歴が max_bytes を超えると古いセグメントから削除されることをテスト"""
+    store = SegmentStore(str(tmp_path), segment_bytes=8192, max_bytes=32 * 1024)
+    ring = Scrollback(2048, store, block_bytes=1024)
+    data = _output(10000)
+    for i in range(0, len(data), 4096):
+        ring.append(data[i:i + 4096])
+
+    assert store.end_seq - store.start_seq <= 32 * 1024 + 8192
+    assert len(os.listdir(tmp_path)) <= 6
+    assert ring.start_seq == store.start_seq > 0
+    assert b''.join(c for _, c in _read_all(ring)) == data[ring.start_seq:]
+
+
+def test_invalid_block_size():
+    with pytest.raises(ValueError):
+        Scrollback(1024, block_bytes=2048)
@@ -0,0 +1,142 @@
+"""セッションマネージャのテスト（fake_cli.py の echo モードを代役に使う）"""
+import asyncio
+import time
+
+import pytest
+
+from app.config import BridgeConfig
+from app.session_manager import SessionLimitError, SessionManager
+
+
+def _config(argv, **overrides):
+    return BridgeConfig(command=argv[0], args=argv[1:], **overrides)
+
+
+async def _read_until(channel, text, timeout=10):
+    data = b''
+    async def _read():
+        nonlocal data
+        while text.encode() not in data:
+            frame = await channel.get()
+            assert frame is not None, data
+            data += frame
+    await asyncio.wait_for(_read(), timeout)
+    return data
+
+
+def test_warm_spare_hides_startup(fake_cli_argv):
+    """待機プロセスから払い出すと起動待ちなしでプロンプトが届き、プールが補充されることをテスト"""
+    config = _config(fake_cli_argv('echo', '--startup-delay', '0.5'), warm_spares=1)
+
+    async def main():
+        manager = SessionManager(config)
+        await manager.start()
+        await asyncio.sleep(0.7)  # 待機プロセスの起動完了を待つ
+        try:
+            start = time.monotonic()
+            session = await manager.open(cols=100, rows=30)
+            await _read_until(manager.attach(session), 'ready>')
+            latency = time.monotonic() - start
+
+            for _ in range(100):
+                if len(manager._spares) == 1:
+                    break
+                await asyncio.sleep(0.05)
+            return latency, len(manager._spares)
+        finally:
+            await manager.shutdown()
+
+    latency, spares = asyncio.run(main())
+    assert latency < 0.4
+    assert spares == 1
+
+
+def test_fan_out_to_multiple_clients(fake_cli_argv):
+    """1つのセッションに接続した複数クライアントへ同じ出力が届くことをテスト"""
+    config = _config(fake_cli_argv('echo'), warm_spares=0)
+
+    async def main():
+        manager = SessionManager(config)
+        await manager.start()
+        try:
+            session = await manager.open()
+            first = manager.attach(session)
+            second = manager.attach(session)
+            await _read_until(first, 'ready>')
+            await _read_until(second, 'ready>')
+            session.write(b'hello\n')
+            return await _read_until(first, 'echo: hello'), await _read_until(second, 'echo: hello')
+        finally:
+            await manager.shutdown()
+
+    first, second = asyncio.run(main())
+    assert b'echo: hello' in first
+    assert b'echo: hello' in second
+
+
+def test_limits(fake_cli_argv):
+    """セッション数・クライアント数の上限と子プロセスのリソース制限をテスト"""
+    config = _config(fake_cli_argv('echo'), warm_spares=0, max_sessions=1, max_clients_per_session=1,
+                     memory_limit_bytes=1024 ** 3)
+
+    async def main():
+        manager = SessionManager(config)
+        await manager.start()
+        try:
+            session = await manager.open()
+            manager.attach(session)
+            with pytest.raises(SessionLimitError):
+                manager.attach(session)
+            with pytest.raises(SessionLimitError):
+                await manager.open()
+            with open(f'/proc/{session.bridge.process.pid}/limits') as f:
+                return f.read()
+        finally:
+            await manager.shutdown()
+
+    limits = asyncio.run(main())
+    line = next(l for l in limits.splitlines() if l.startswith('Max address space'))
+    assert str(1024 ** 3) in line
+
+
+def test_idle_session_is_closed(fake_cli_argv):
+    """クライアントがいないまま idle_timeout を過ぎたセッションが終了することをテスト"""
+    config = _config(fake_cli_argv('echo'), warm_spares=0, idle_timeout=0.2)
+
+    async def main():
+        manager = SessionManager(config)
+        await manager.start()
+        try:
+            session = await manager.open()
+            channel = manager.attach(session)
+            await asyncio.sleep(0.4)
+            assert session.id in manager.sessions  # 接続中は終了しない
+            session.detach(channel)
+            for _ in range(40):
+                if session.id not in manager.sessions:
+                    break
+                await asyncio.sleep(0.05)
+            return session
+        finally:
+            await manager.shutdown()
+
+    session = asyncio.run(main())
+    assert session.exited
+
+
+def test_concurrent_open_respects_limit(fake_cli_argv):
+    """同時に開いても max_sessions を超えないことをテスト"""
+    config = _config(fake_cli_argv('echo'), warm_spares=0, max_sessions=2)
+
+    async def main():
+        manager = SessionManager(config)
+        await manager.start()
+        try:
+            results = await asyncio.gather(*(manager.open() for _ in range(6)), return_exceptions=True)
+            return results, len(manager.sessions)
+        finally:
+            await manager.shutdown()
+
+    results, count = asyncio.run(main())
+    assert count == 2
+    assert sum(isinstance(r, SessionLimitError) for r in results) == 4